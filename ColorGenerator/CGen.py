@@ -1,17 +1,91 @@
+from __future__ import annotations
+
+import time
+STARTUP_T0 = time.perf_counter()
+
 import sys
-import argparse
+import colorsys
+import csv
+import fnmatch
+import io
+import math
+import mmap
 import json
 import re
-import random
 import os
-import urllib.request
+import struct
+import threading
+from array import array
+from bisect import bisect_left
 from pathlib import Path
-from dataclasses import dataclass
-from typing import Any
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from functools import lru_cache, wraps
+from itertools import chain, islice
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, TextIO
+
+if TYPE_CHECKING:
+    import argparse
+    import asyncio
+    import random
+    from concurrent.futures import Executor
+
+np: Any = None
+_NUMPY_LOADED = False
+
+def load_numpy() -> Any:
+    global np, _NUMPY_LOADED
+    if not _NUMPY_LOADED:
+        _NUMPY_LOADED = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
 
-VERSION = "1.2"
+VERSION = "1.3"
 UPDATE_URL = "https://raw.githubusercontent.com/SparkCry/ColorGenerator/refs/heads/main/ColorGenerator/CGen.py"
 BASE_DIR = Path(__file__).resolve().parent
+ASSETS_DIR = BASE_DIR / 'assets'
+CACHE_DIR = ASSETS_DIR / '.cache'
+UPDATE_CACHE = CACHE_DIR / 'update.json'
+UPDATE_TTL = 86400
+UPDATE_RETRY = 600
+UPDATE_EXIT_WAIT = 1.0
+UPDATE_PROBE_BYTES = 4096
+SOCKET_CHUNK = 65536
+VERSION_PATTERN = re.compile(r'VERSION\s*=\s*"([^"]+)"')
+STREAM_WINDOW = 256
+FORMAT_WINDOW = 4096
+JOB_CHUNK = 8192
+RANDOM_BLOCK = 65536
+GRADIENT_STEPS = 10
+GRADIENT_SPACES = ['oklab', 'oklch']
+GRADIENT_ACHROMATIC = 1e-4
+CONTRAST_LEVELS = {'aa': (4.5, 3.0), 'aaa': (7.0, 4.5)}
+CONTRAST_FORMATS = ['csv', 'jsonl']
+CONTRAST_BLOCK_CELLS = 1 << 20
+RANDOM_STRATEGIES = ['uniform', 'hsl', 'oklch', 'golden']
+GOLDEN_RATIO_CONJUGATE = 0.6180339887498949
+BULK_MIN_BATCH = 64
+CACHE_SIZE = 4096
+INTERACTIVE_CHUNK = 256
+INTERACTIVE_LABEL_WIDTH = 30
+INTERACTIVE_MEMO_SIZE = 65536
+NEAREST_GRID = 32
+OKLAB_BOUNDS = ((0.0, 1.0001), (-0.24, 0.28), (-0.32, 0.2))
+COLOR_DEPTHS = [24, 256, 16]
+XTERM_BASIC_RGB = [
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0), (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0), (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255)
+]
+XTERM_CUBE_LEVELS = [0, 95, 135, 175, 215, 255]
+SCAN_WINDOW = 1 << 20
+SCAN_BINARY_PROBE = 8192
+SCAN_DEFAULT_IGNORES = ['.git/', '.hg/', '.svn/', 'node_modules/', '__pycache__/', '.cache/', '.venv/', 'venv/']
+HEX_PATTERN = re.compile(r'^#?([a-f0-9]{6}|[a-f0-9]{3})$')
 
 COLOR_LIST: dict[str, set[str]] = {
     "en": {"yellow", "red", "green", "blue", "white", "black", "purple", "cyan", "orange", "gray"},
@@ -29,14 +103,27 @@ class ProgrammingProfile:
     prefix: str
     suffix: str
     theme_rgb: tuple[int, int, int]
+    depth: int = 24
     
     def format(self, code: str) -> str:
         return f"{self.prefix}{code}{self.suffix}"
         
     def get_theme_ansi(self) -> str:
+        if self.depth != 24:
+            return f"\033[{get_quantizer(self.depth).body(self.theme_rgb)}m"
         r, g, b = self.theme_rgb
         return f"\033[38;2;{r};{g};{b}m"
 
+    def with_depth(self, depth: int) -> 'ProgrammingProfile':
+        return self if depth == self.depth else replace(self, depth=depth)
+
+    def compile(self) -> Callable[[str], str]:
+        escape = lambda text: text.replace('{', '{{').replace('}', '}}')
+        return f"{escape(self.prefix)}{{}}{escape(self.suffix)}".format
+
+def as_profiles(profile: ProgrammingProfile | list[ProgrammingProfile]) -> list[ProgrammingProfile]:
+    return profile if isinstance(profile, list) else [profile]
+
 TARGET_PROFILES = {
     'python': ProgrammingProfile('python', "Python", ['-p', '--python'], "\\033[", "m", (55, 118, 171)),
     'java':   ProgrammingProfile('java', "Java", ['-j', '--java'], "\\u001b[", "m", (220, 20, 60)),
@@ -47,12 +134,488 @@ TARGET_PROFILES = {
     'go':     ProgrammingProfile('go', "Go", ['-g', '--go'], "\\x1b[", "m", (0, 173, 216))
 }
 
-class SystemManager:
+class StageStats:
+    STAGES = ['startup', 'config', 'update', 'pack', 'resolve', 'nearest', 'generate', 'render', 'write']
+
     def __init__(self):
-        self.colors: dict[str, str] = {}
+        self.enabled = False
+        self.times: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+
+    def add(self, stage: str, elapsed: float, calls: int = 1):
+        self.times[stage] = self.times.get(stage, 0.0) + elapsed
+        self.calls[stage] = self.calls.get(stage, 0) + calls
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def take(self) -> tuple[dict[str, float], dict[str, int]]:
+        times, calls = self.times, self.calls
+        self.times, self.calls = {}, {}
+        return times, calls
+
+    def merge(self, times: dict[str, float], calls: dict[str, int]):
+        for stage, elapsed in times.items():
+            self.add(stage, elapsed, calls[stage])
+
+    def instrument(self, owner: Any, attr: str, stage: str):
+        original = getattr(owner, attr)
+        add = self.add
+        perf_counter = time.perf_counter
+
+        @wraps(original)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                add(stage, perf_counter() - start)
+
+        setattr(owner, attr, timed)
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        for owner, attr, stage in (
+            (SystemManager, 'resolve_color', 'resolve'),
+            (BulkEngine, 'resolve', 'resolve'),
+            (NearestIndex, 'query', 'nearest'),
+            (NearestIndex, 'query_many', 'nearest'),
+            (AnsiFactory, 'body', 'generate'),
+            (AnsiFactory, 'get_preview_str', 'generate'),
+            (BulkEngine, 'bodies', 'generate'),
+            (BulkEngine, 'wrap', 'generate'),
+            (BulkEngine, 'previews', 'generate'),
+            (PrettyRenderer, 'format_tails', 'render'),
+            (PrettyRenderer, 'number_lines', 'render'),
+            (JsonlRenderer, 'render_records', 'render'),
+            (CsvRenderer, 'render_records', 'render'),
+            (RawRenderer, 'render_records', 'render'),
+            (NearestPrettyRenderer, 'render_records', 'render'),
+            (NearestPrettyRenderer, 'finish', 'render'),
+            (NearestJsonlRenderer, 'render_records', 'render'),
+            (NearestCsvRenderer, 'render_records', 'render'),
+            (NearestRawRenderer, 'render_records', 'render'),
+            (sys.modules[__name__], 'format_result_line', 'render')
+        ):
+            self.instrument(owner, attr, stage)
+        sys.stdout = TimedWriter(sys.stdout, self)
+
+    def report(self, system: 'SystemManager', err: TextIO | None = None):
+        err = err or sys.stderr
+        total = time.perf_counter() - STARTUP_T0
+        print(f"\033[96m{system.get_text('msg_stats_header')}\033[0m", file=err)
+        for stage in self.STAGES + sorted(set(self.times) - set(self.STAGES)):
+            if stage in self.times:
+                elapsed = self.times[stage]
+                print(f"    {stage:<10} {elapsed * 1000:>12.3f} ms {self.calls[stage]:>12} {elapsed / total:>8.1%}", file=err)
+        print(f"    {'total':<10} {total * 1000:>12.3f} ms", file=err)
+        for stats in system.cache_stats():
+            print(f"    {stats['name'] + ' cache':<16} {stats['hit_rate']:>8.1%} hit rate ({stats['hits']} hits, {stats['misses']} misses)", file=err)
+
+class TimedWriter:
+    def __init__(self, stream: TextIO, stats: StageStats):
+        self.stream = stream
+        self.stats = stats
+
+    def write(self, text: str) -> int:
+        start = time.perf_counter()
+        try:
+            return self.stream.write(text)
+        finally:
+            self.stats.add('write', time.perf_counter() - start)
+
+    def flush(self):
+        start = time.perf_counter()
+        try:
+            self.stream.flush()
+        finally:
+            self.stats.add('write', time.perf_counter() - start, calls=0)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+STATS = StageStats()
+
+class LRUCache:
+    MISSING = object()
+
+    def __init__(self, name: str, maxsize: int = CACHE_SIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Any, Any] = OrderedDict()
+
+    def get(self, key: Any, default: Any = MISSING) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Any, value: Any):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+def atomic_write(path: Path, data: bytes):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+HEX_FORMATS = ("#%06X", "#%06x")
+
+class PaletteStore:
+    LOWER_FLAG = 1 << 24
+
+    def __init__(self, names: list[str] | None = None, packed: array | None = None, irregular: dict[str, str] | None = None):
+        self.names = names if names is not None else []
+        self.packed = packed if packed is not None else array('I')
+        self.irregular = irregular or {}
+
+    @classmethod
+    def from_mapping(cls, palette: dict[str, str]) -> 'PaletteStore':
+        names = sorted(palette)
+        packed = array('I')
+        irregular = {}
+        for name in names:
+            value = cls.pack_hex(palette[name])
+            if value is None:
+                irregular[name] = palette[name]
+                value = 0
+            packed.append(value)
+        return cls(names, packed, irregular)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.index(name) >= 0
+
+    def __getitem__(self, name: str) -> str:
+        i = self.index(name)
+        if i < 0:
+            raise KeyError(name)
+        return self.hex_at(i)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        i = self.index(name)
+        return self.hex_at(i) if i >= 0 else default
+
+    def keys(self) -> list[str]:
+        return self.names
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        return self.with_prefix('')
+
+    def index(self, name: str) -> int:
+        names = self.names
+        i = bisect_left(names, name)
+        return i if i < len(names) and names[i] == name else -1
+
+    def hex_at(self, i: int) -> str:
+        if self.irregular:
+            irregular = self.irregular.get(self.names[i])
+            if irregular is not None:
+                return irregular
+        return self.unpack_hex(self.packed[i])
+
+    def rgb_at(self, i: int) -> tuple[int, int, int]:
+        if self.irregular and self.names[i] in self.irregular:
+            return SystemManager._hex_to_rgb(self.irregular[self.names[i]])
+        return self.unpack_rgb(self.packed[i])
+
+    def rgb(self, name: str) -> tuple[int, int, int] | None:
+        i = self.index(name)
+        return self.rgb_at(i) if i >= 0 else None
+
+    def lookup(self, name: str) -> tuple[str, tuple[int, int, int]] | None:
+        names = self.names
+        i = bisect_left(names, name)
+        if i == len(names) or names[i] != name:
+            return None
+        if self.irregular and name in self.irregular:
+            return (self.irregular[name], self.rgb_at(i))
+        value = self.packed[i]
+        return (HEX_FORMATS[value >> 24] % (value & 0xFFFFFF), ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF))
+
+    def prefix_range(self, prefix: str) -> range:
+        start = bisect_left(self.names, prefix)
+        end = bisect_left(self.names, prefix + '\U0010ffff', start) if prefix else len(self.names)
+        return range(start, end)
+
+    def with_prefix(self, prefix: str) -> Iterator[tuple[str, str]]:
+        span = self.prefix_range(prefix)
+        if self.irregular:
+            return ((self.names[i], self.hex_at(i)) for i in span)
+        return zip(self.names[span.start:span.stop], map(self.unpack_hex, self.packed[span.start:span.stop]))
+
+    @classmethod
+    def pack_hex(cls, hex_val: Any) -> int | None:
+        if not isinstance(hex_val, str) or not re.fullmatch(r'#([0-9A-F]{6}|[0-9a-f]{6})', hex_val):
+            return None
+        value = int(hex_val[1:], 16)
+        return value | cls.LOWER_FLAG if hex_val[1:] != hex_val[1:].upper() else value
+
+    @staticmethod
+    def unpack_hex(value: int) -> str:
+        return HEX_FORMATS[value >> 24] % (value & 0xFFFFFF)
+
+    @staticmethod
+    def unpack_rgb(value: int) -> tuple[int, int, int]:
+        return ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+
+class PackCache:
+    MAGIC = b'CGPK'
+    INDEX_MAGIC = b'CGIX'
+    FORMAT_VERSION = 2
+    HEADER = struct.Struct('<4sHqq20sIII')
+    INDEX_HEADER = struct.Struct('<4sHqI')
+
+    def __init__(self, pack_dir: Path = ASSETS_DIR, cache_dir: Path = CACHE_DIR):
+        self.pack_dir = pack_dir
+        self.cache_dir = cache_dir
+
+    def list_packs(self) -> list[str]:
+        index_path = self.cache_dir / 'packs.idx'
+        try:
+            dir_mtime = self.pack_dir.stat().st_mtime_ns
+            blob = index_path.read_bytes()
+            magic, version, mtime_ns, length = self.INDEX_HEADER.unpack_from(blob)
+            if (magic, version, mtime_ns) == (self.INDEX_MAGIC, self.FORMAT_VERSION, dir_mtime):
+                body = blob[self.INDEX_HEADER.size:self.INDEX_HEADER.size + length].decode('utf-8')
+                return body.split('\n') if body else []
+        except (OSError, struct.error, UnicodeDecodeError):
+            pass
+
+        if not self.pack_dir.exists():
+            return []
+
+        try:
+            self.cache_dir.mkdir(exist_ok=True)
+        except OSError:
+            pass
+
+        dir_mtime = self.pack_dir.stat().st_mtime_ns
+        codes = sorted(f.stem.replace('pack_', '') for f in self.pack_dir.glob('pack_*.json') if f.is_file())
+        body = '\n'.join(codes).encode('utf-8')
+        atomic_write(index_path, self.INDEX_HEADER.pack(self.INDEX_MAGIC, self.FORMAT_VERSION, dir_mtime, len(body)) + body)
+        return codes
+
+    def load(self, pack_code: str) -> tuple[PaletteStore, dict[str, str]]:
+        json_path = self.pack_dir / f'pack_{pack_code}.json'
+        cache_path = self.cache_dir / f'pack_{pack_code}.bin'
+        st = json_path.stat()
+
+        header = None
+        try:
+            blob = cache_path.read_bytes()
+            header = self.HEADER.unpack_from(blob)
+            if header[:2] != (self.MAGIC, self.FORMAT_VERSION):
+                header = None
+        except (OSError, struct.error):
+            pass
+
+        if header and header[2:4] == (st.st_mtime_ns, st.st_size):
+            return self._decode(blob, header)
+
+        import hashlib
+        raw = json_path.read_bytes()
+        digest = hashlib.sha1(raw).digest()
+
+        if header and header[4] == digest:
+            refreshed = self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION, st.st_mtime_ns, st.st_size, digest, *header[5:])
+            atomic_write(cache_path, refreshed + blob[self.HEADER.size:])
+            return self._decode(blob, header)
+
+        data = json.loads(raw.decode('utf-8'))
+        palette = data.get('palette', {})
+        strings = data.get('interface', {})
+
+        store = PaletteStore.from_mapping(palette)
+        if store.irregular:
+            return store, strings
+
+        names_blob = '\n'.join(store.names).encode('utf-8')
+        strings_blob = json.dumps(strings, ensure_ascii=False).encode('utf-8')
+        values = array('I', store.packed)
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        header = self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION, st.st_mtime_ns, st.st_size, digest, len(store), len(names_blob), len(strings_blob))
+        atomic_write(cache_path, header + names_blob + values.tobytes() + strings_blob)
+        return store, strings
+
+    def _decode(self, blob: bytes, header: tuple) -> tuple[PaletteStore, dict[str, str]]:
+        count, names_len, strings_len = header[5:]
+        offset = self.HEADER.size
+        names = blob[offset:offset + names_len].decode('utf-8').split('\n') if count else []
+        offset += names_len
+
+        values = array('I')
+        values.frombytes(blob[offset:offset + count * values.itemsize])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        offset += count * values.itemsize
+
+        strings = json.loads(blob[offset:offset + strings_len].decode('utf-8'))
+        return PaletteStore(names, values), strings
+
+class PackIndex:
+    MAGIC = b'CGNI'
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct('<4sH20sIII')
+
+    def __init__(self, packs: list[str], entries: dict[str, list[tuple[int, int]]]):
+        self.packs = packs
+        self.entries = entries
+
+    @classmethod
+    def load(cls, pack_cache: PackCache, packs: list[str]) -> 'PackIndex':
+        cache_path = pack_cache.cache_dir / 'names.idx'
+        signature = cls._signature(pack_cache, packs)
+
+        try:
+            blob = cache_path.read_bytes()
+            header = cls.HEADER.unpack_from(blob)
+            if header[:3] == (cls.MAGIC, cls.FORMAT_VERSION, signature):
+                return cls._decode(blob, header)
+        except (OSError, struct.error, UnicodeDecodeError):
+            pass
+
+        index = cls.build(pack_cache, packs)
+        try:
+            pack_cache.cache_dir.mkdir(exist_ok=True)
+        except OSError:
+            pass
+        atomic_write(cache_path, index._encode(signature))
+        return index
+
+    @classmethod
+    def build(cls, pack_cache: PackCache, packs: list[str]) -> 'PackIndex':
+        entries: dict[str, list[tuple[int, int]]] = {}
+        for pack_idx, pack_code in enumerate(packs):
+            try:
+                palette, _ = pack_cache.load(pack_code)
+            except (OSError, ValueError):
+                continue
+            for i, name in enumerate(palette.names):
+                if name in palette.irregular:
+                    try:
+                        r, g, b = palette.rgb_at(i)
+                    except ValueError:
+                        continue
+                    value = (r << 16) | (g << 8) | b
+                else:
+                    value = palette.packed[i]
+                entries.setdefault(name, []).append((pack_idx, value))
+        return cls(packs, entries)
+
+    @staticmethod
+    def _signature(pack_cache: PackCache, packs: list[str]) -> bytes:
+        import hashlib
+        parts = []
+        for pack_code in packs:
+            try:
+                st = (pack_cache.pack_dir / f'pack_{pack_code}.json').stat()
+                parts.append(f"{pack_code}:{st.st_mtime_ns}:{st.st_size}")
+            except OSError:
+                parts.append(f"{pack_code}:-")
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).digest()
+
+    def _encode(self, signature: bytes) -> bytes:
+        names, pack_ids, values = [], array('B'), array('I')
+        for name, hits in self.entries.items():
+            for pack_idx, value in hits:
+                names.append(name)
+                pack_ids.append(pack_idx)
+                values.append(value)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        packs_blob = '\n'.join(self.packs).encode('utf-8')
+        names_blob = '\n'.join(names).encode('utf-8')
+        header = self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION, signature, len(names), len(packs_blob), len(names_blob))
+        return header + packs_blob + names_blob + pack_ids.tobytes() + values.tobytes()
+
+    @classmethod
+    def _decode(cls, blob: bytes, header: tuple) -> 'PackIndex':
+        count, packs_len, names_len = header[3:]
+        offset = cls.HEADER.size
+        packs = blob[offset:offset + packs_len].decode('utf-8').split('\n') if packs_len else []
+        offset += packs_len
+        names = blob[offset:offset + names_len].decode('utf-8').split('\n') if count else []
+        offset += names_len
+
+        pack_ids = array('B', blob[offset:offset + count])
+        offset += count
+        values = array('I')
+        values.frombytes(blob[offset:offset + count * values.itemsize])
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        entries: dict[str, list[tuple[int, int]]] = {}
+        for name, pack_idx, value in zip(names, pack_ids, values):
+            entries.setdefault(name, []).append((pack_idx, value))
+        return cls(packs, entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.entries
+
+    def lookup(self, name: str) -> list[tuple[str, str, tuple[int, int, int]]]:
+        return [(self.packs[pack_idx], PaletteStore.unpack_hex(value), PaletteStore.unpack_rgb(value)) for pack_idx, value in self.entries.get(name, ())]
+
+    def resolve(self, name: str) -> tuple[str, tuple[int, int, int]] | None:
+        hits = self.entries.get(name)
+        if not hits:
+            return None
+        value = hits[0][1]
+        return (PaletteStore.unpack_hex(value), PaletteStore.unpack_rgb(value))
+
+class SystemManager:
+    def __init__(self, config: dict[str, Any] | None = None):
+        self.colors = PaletteStore()
         self.strings: dict[str, str] = {} 
         self.current_pack = 'en'
-        self.config_path = BASE_DIR / 'assets' / 'settings.json'
+        self.config_path = ASSETS_DIR / 'settings.json'
+        self.pack_cache = PackCache()
+        self._available_packs: list[str] | None = None
         
         self.defaults = {
             "color_mode": "{0} Color Mode",
@@ -61,6 +624,7 @@ class SystemManager:
             "download_hint": "Color key not available, you can download a variety of colors at: {0}",
             "missing_pack_msg": "[!] Detected input from '{0}'. The file pack 'pack_{1}.json' is missing.\n    Download it here: {2}",
             "exit_msg": "Exiting...",
+            "msg_batch_cancelled": "[!] Batch cancelled after {0} results.",
             "pack_error": "[!] Error loading file pack: {0}",
             "help_col_flag": "FLAG",
             "help_col_pack": "PACK",
@@ -70,6 +634,11 @@ class SystemManager:
             "help_msg_no_pack": "You don't have any pack at the moment",
             "help_msg_input_desc": "Hex Codes or Color Names",
             "help_msg_random_desc": "Generate N random colors",
+            "help_msg_seed_desc": "Seed for reproducible random colors",
+            "help_msg_strategy_desc": "uniform, hsl, oklch or golden (hue spacing)",
+            "help_msg_lightness_desc": "Fixed lightness (0-1) for hsl/oklch/golden",
+            "help_msg_saturation_desc": "Fixed saturation (0-1) for hsl/golden",
+            "help_msg_chroma_desc": "Fixed chroma (0-1) for oklch (default 0.12)",
             "security_limit_msg": "[!] Security: Limit of {0} colors exceeded. Truncating to {0}.",
             "help_check_update": "Check and update CGen",
             "help_show_version": "Show current version",
@@ -85,17 +654,64 @@ class SystemManager:
             "msg_fetch_error": "[!] Failed to fetch update. Status Code: {0}",
             "msg_update_check_fail": "[!] Update check failed: {0}",
             "msg_pack_fallback": "[!] pack '{0}' not found. Falling back to 'en'.",
-            "err_general": "[!] Error: {0}"
+            "err_general": "[!] Error: {0}",
+            "help_msg_stdin_desc": "Stream colors from standard input",
+            "help_msg_input_file_desc": "Stream colors from a file ('-' for stdin)",
+            "err_input_file": "[!] Cannot read input file: {0}",
+            "help_msg_cache_stats": "Report resolver cache hit/miss statistics",
+            "msg_cache_stats": "[i] {0} cache: {1} hits, {2} misses ({3:.1%} hit rate), {4}/{5} entries",
+            "msg_update_hint": "    Run 'cgen --update' to install it.",
+            "help_msg_serve_desc": "Run a warm conversion server",
+            "help_msg_connect_desc": "Send this conversion to a running server",
+            "help_msg_address_desc": "Server address (unix:PATH or HOST:PORT)",
+            "msg_server_listening": "[i] CGen server listening on {0}",
+            "err_server_connect": "[!] Cannot reach CGen server at {0}: {1}",
+            "err_server_request": "[!] Invalid server request: {0}",
+            "help_msg_format_desc": "Output format: pretty, raw, jsonl, csv",
+            "help_msg_jobs_desc": "Convert with N worker processes (0 = all cores)",
+            "help_msg_stats_desc": "Report per-stage timings and cache hit rates",
+            "help_msg_profile_desc": "Write a cProfile/pstats dump of the run",
+            "msg_stats_header": "[i] Stage timings (wall time, calls, share of total):",
+            "warn_profile_jobs": "[!] --profile only covers the main process; worker resolve/generate/render time is not in the dump. Run without -J to profile those stages.",
+            "help_msg_nearest_desc": "Name the closest palette color for each input",
+            "help_msg_depth_desc": "Color depth: 24 (true color), 256 or 16",
+            "help_msg_profiles_desc": "Comma-separated profiles to emit in one pass",
+            "help_msg_all_profiles_desc": "Emit every profile in one pass",
+            "help_msg_scan_desc": "Report hardcoded escape codes and hex colors in a tree",
+            "msg_scan_summary": "[i] Scanned {0} files: {1} colors in {2} files ({3} skipped)",
+            "err_scan_path": "[!] Cannot scan '{0}': {1}",
+            "help_msg_convert_desc": "Rewrite escape codes from one profile's syntax to another's",
+            "msg_convert_summary": "[i] Checked {0} files: {1} sequences rewritten in {2} files{3}",
+            "warn_convert_leftover": "[!] {0}:{1}: {2} escape prefix not followed by a complete sequence; left unchanged",
+            "msg_convert_dry_run": " (dry run, nothing written)",
+            "err_convert_same": "[!] '{0}' and '{1}' use the same escape syntax; nothing to convert.",
+            "help_msg_translate_desc": "Name each color with the closest color of another pack",
+            "help_msg_gradient_desc": "Interpolate N colors between two or more stops in OKLab/OKLCH",
+            "help_msg_contrast_desc": "WCAG contrast ratios for every pair of colors or against backgrounds",
+            "msg_contrast_summary": "[i] {0} pairs checked: {1} pass AA, {2} pass AAA, {3} emitted.",
+            "err_translate_pack": "[!] pack '{0}' is not installed; cannot translate into it.",
+            "err_pack_missing": "[!] pack '{0}' is not installed."
         }
         
-        self.config = self._load_config()
+        if config is None:
+            with STATS.stage('config'):
+                self.config = self._load_config()
+        else:
+            self.config = dict(config)
+        self.resolve_cache = LRUCache('resolve')
+        self.render_cache = LRUCache('render')
+        self._bulk_engine = None
+        self._nearest_index = None
+        self._pack_indexes: dict[str, 'NearestIndex'] = {}
+        self._pack_index = None
 
     def _load_config(self) -> dict[str, Any]:
         base_settings = {
             "pack": "en",
             "language": "python",
             "random-limit": 100,
-            "check-update": True
+            "check-update": True,
+            "update-ttl": UPDATE_TTL
         }
         
         if not self.config_path.exists():
@@ -117,14 +733,20 @@ class SystemManager:
             pass
 
     def save_pack(self, pack_code: str):
+        if self.config.get('pack') == pack_code:
+            return
         self.config['pack'] = pack_code
         self._save_config_file(self.config)
 
     def save_profile(self, profile_id: str):
+        if self.config.get('language') == profile_id:
+            return
         self.config['language'] = profile_id
         self._save_config_file(self.config)
 
     def save_random_limit(self, limit: int):
+        if self.config.get('random-limit') == limit:
+            return
         self.config['random-limit'] = limit
         self._save_config_file(self.config)
 
@@ -132,28 +754,27 @@ class SystemManager:
         return self.config.get(key, self.defaults.get(key, default))
 
     def get_available_packs(self) -> list[str]:
-        pack_dir = BASE_DIR / 'assets'
-        if not pack_dir.exists():
-            return []
-        
-        codes = [f.stem.replace('pack_', '') for f in pack_dir.glob('pack_*.json') if f.is_file()]
-        return sorted(codes)
+        if self._available_packs is None:
+            self._available_packs = self.pack_cache.list_packs()
+        return list(self._available_packs)
 
     def load_pack(self, pack_code: str):
+        with STATS.stage('pack'):
+            self._load_pack(pack_code)
+
+    def _load_pack(self, pack_code: str):
         self.current_pack = pack_code
-        file_path = BASE_DIR / 'assets' / f'pack_{pack_code}.json'
+        self.clear_caches()
+        self._nearest_index = None
         
-        if not file_path.exists():
+        if not self.is_file_pack_present(pack_code):
             if pack_code != 'en':
                 print(f"\033[93m{self.get_text('msg_pack_fallback', pack_code)}\033[0m")
-                self.load_pack('en')
+                self._load_pack('en')
             return
 
         try:
-            with file_path.open('r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.colors = data.get('palette', {})
-                self.strings = data.get('interface', {})
+            self.colors, self.strings = self.pack_cache.load(pack_code)
         except Exception as e:
             print(f"\033[91m{self.defaults['pack_error'].format(e)}\033[0m")
 
@@ -163,14 +784,72 @@ class SystemManager:
             return template.format(*args)
         return template
 
+    @property
+    def bulk_engine(self) -> 'BulkEngine':
+        if self._bulk_engine is None:
+            self._bulk_engine = BulkEngine(self)
+        return self._bulk_engine
+
+    @property
+    def nearest_index(self) -> 'NearestIndex':
+        if self._nearest_index is None:
+            with STATS.stage('nearest'):
+                self._nearest_index = NearestIndex.from_palette(self.colors)
+        return self._nearest_index
+
+    def nearest_index_for(self, pack_code: str | None) -> 'NearestIndex':
+        if pack_code is None or pack_code == self.current_pack:
+            return self.nearest_index
+        index = self._pack_indexes.get(pack_code)
+        if index is None:
+            with STATS.stage('nearest'):
+                palette, _ = self.pack_cache.load(pack_code)
+                index = self._pack_indexes[pack_code] = NearestIndex.from_palette(palette)
+        return index
+
+    @property
+    def pack_index(self) -> PackIndex:
+        if self._pack_index is None:
+            with STATS.stage('pack'):
+                self._pack_index = PackIndex.load(self.pack_cache, self.get_available_packs())
+        return self._pack_index
+
+    def clear_caches(self):
+        self.resolve_cache.clear()
+        self.render_cache.clear()
+
+    def cache_stats(self) -> list[dict[str, Any]]:
+        return [dict(cache.stats(), name=cache.name) for cache in (self.resolve_cache, self.render_cache)]
+
+    def take_cache_counts(self) -> dict[str, tuple[int, int]]:
+        counts = {}
+        for cache in (self.resolve_cache, self.render_cache):
+            counts[cache.name] = (cache.hits, cache.misses)
+            cache.hits = cache.misses = 0
+        return counts
+
+    def merge_cache_counts(self, counts: dict[str, tuple[int, int]]):
+        for cache in (self.resolve_cache, self.render_cache):
+            hits, misses = counts.get(cache.name, (0, 0))
+            cache.hits += hits
+            cache.misses += misses
+
     def resolve_color(self, name_or_hex: str) -> tuple[str, tuple[int, int, int]] | None:
         clean = name_or_hex.strip().lower()
-        
-        if clean in self.colors:
-            hex_val = self.colors[clean]
-            return (hex_val, self._hex_to_rgb(hex_val))
+        key = (self.current_pack, clean)
+
+        result = self.resolve_cache.get(key)
+        if result is LRUCache.MISSING:
+            result = self._resolve_clean(clean)
+            self.resolve_cache.put(key, result)
+        return result
+
+    def _resolve_clean(self, clean: str) -> tuple[str, tuple[int, int, int]] | None:
+        named = self.colors.lookup(clean)
+        if named is not None:
+            return named
             
-        hex_match = re.match(r'^#?([a-f0-9]{6}|[a-f0-9]{3})$', clean)
+        hex_match = HEX_PATTERN.match(clean)
         if hex_match:
             hex_part = hex_match.group(1)
             if len(hex_part) == 3:
@@ -181,7 +860,7 @@ class SystemManager:
                 return (final_hex, self._hex_to_rgb(final_hex))
             except ValueError:
                 pass
-        return None
+        return self.pack_index.resolve(clean)
 
     def detect_potential_pack(self, user_input: str) -> str | None:
         clean = user_input.strip().lower()
@@ -191,7 +870,7 @@ class SystemManager:
         return None
 
     def is_file_pack_present(self, pack_code: str) -> bool:
-        return (BASE_DIR / 'assets' / f'pack_{pack_code}.json').exists()
+        return pack_code in self.get_available_packs()
 
     @staticmethod
     def _hex_to_rgb(hex_code: str) -> tuple[int, int, int]:
@@ -200,19 +879,26 @@ class SystemManager:
             hex_code = "".join(c * 2 for c in hex_code)
         return tuple(int(hex_code[i:i+2], 16) for i in (0, 2, 4))
 
-SYSTEM = SystemManager()
+_SYSTEM: SystemManager | None = None
+
+def get_system() -> SystemManager:
+    global _SYSTEM
+    if _SYSTEM is None:
+        _SYSTEM = SystemManager()
+    return _SYSTEM
 
 def print_aesthetic_help():
     reset = "\033[0m"
     turquoise = "\033[1;36m" 
     gray = "\033[90m"
     bold = "\033[1m"
+    system = get_system()
     
     print(f"\n{turquoise}   CGen v{VERSION} {reset}")
     print(f"   {gray}{'='*38}{reset}\n")
 
-    col_flag = SYSTEM.get_text('help_col_flag')
-    col_pack = SYSTEM.get_text('help_col_pack')
+    col_flag = system.get_text('help_col_flag')
+    col_pack = system.get_text('help_col_pack')
     print(f"   {bold}{col_flag:<18} {col_pack:<15}{reset}")
     print(f"   {gray}{'-'*18} {'-'*15}{reset}")
 
@@ -221,53 +907,94 @@ def print_aesthetic_help():
         theme = profile.get_theme_ansi()
         print(f"   {flags_desc:<18} {theme}{profile.name}{reset}")
 
-    col_opt = SYSTEM.get_text('help_col_option')
-    col_desc = SYSTEM.get_text('help_col_desc')
+    col_opt = system.get_text('help_col_option')
+    col_desc = system.get_text('help_col_desc')
     print(f"\n   {bold}{col_opt:<18} {col_desc:<15}{reset}")
     print(f"   {gray}{'-'*18} {'-'*15}{reset}")
 
-    packs = SYSTEM.get_available_packs()
+    packs = system.get_available_packs()
     if packs:
         pack_str = ", ".join(packs)
-        pack_desc = SYSTEM.get_text('help_msg_avail_pack', pack_str)
+        pack_desc = system.get_text('help_msg_avail_pack', pack_str)
     else:
-        pack_desc = SYSTEM.get_text('help_msg_no_pack')
+        pack_desc = system.get_text('help_msg_no_pack')
 
     print(f"   {'--pack <code>':<18} {pack_desc}")
     
-    rand_desc = SYSTEM.get_text('help_msg_random_desc')
+    rand_desc = system.get_text('help_msg_random_desc')
     print(f"   {'-r, --random [N]':<18} {rand_desc}")
-
-    print(f"   {'--update':<18} {SYSTEM.get_text('help_check_update')}")
-    print(f"   {'--version':<18} {SYSTEM.get_text('help_show_version')}")
+    print(f"   {'--seed <n>':<18} {system.get_text('help_msg_seed_desc')}")
+    print(f"   {'--strategy <name>':<18} {system.get_text('help_msg_strategy_desc')}")
+    print(f"   {'--lightness <l>':<18} {system.get_text('help_msg_lightness_desc')}")
+    print(f"   {'--saturation <s>':<18} {system.get_text('help_msg_saturation_desc')}")
+    print(f"   {'--chroma <c>':<18} {system.get_text('help_msg_chroma_desc')}")
+
+    print(f"   {'--stdin':<18} {system.get_text('help_msg_stdin_desc')}")
+    print(f"   {'--input <file>':<18} {system.get_text('help_msg_input_file_desc')}")
+
+    print(f"   {'--format <fmt>':<18} {system.get_text('help_msg_format_desc')}")
+    print(f"   {'--nearest':<18} {system.get_text('help_msg_nearest_desc')}")
+    print(f"   {'--translate <pack>':<18} {system.get_text('help_msg_translate_desc')}")
+    print(f"   {'--depth <bits>':<18} {system.get_text('help_msg_depth_desc')}")
+    print(f"   {'--profiles <list>':<18} {system.get_text('help_msg_profiles_desc')}")
+    print(f"   {'--all-profiles':<18} {system.get_text('help_msg_all_profiles_desc')}")
+    print(f"   {'-J, --jobs N':<18} {system.get_text('help_msg_jobs_desc')}")
+    print(f"   {'--cache-stats':<18} {system.get_text('help_msg_cache_stats')}")
+    print(f"   {'--stats':<18} {system.get_text('help_msg_stats_desc')}")
+    print(f"   {'--profile <file>':<18} {system.get_text('help_msg_profile_desc')}")
+
+    print(f"   {'--serve':<18} {system.get_text('help_msg_serve_desc')}")
+    print(f"   {'--connect':<18} {system.get_text('help_msg_connect_desc')}")
+    print(f"   {'--address <addr>':<18} {system.get_text('help_msg_address_desc')}")
+
+    print(f"   {'--update':<18} {system.get_text('help_check_update')}")
+    print(f"   {'--version':<18} {system.get_text('help_show_version')}")
+    print(f"   {'scan <path>...':<18} {system.get_text('help_msg_scan_desc')}")
+    print(f"   {'convert <path>...':<18} {system.get_text('help_msg_convert_desc')}")
+    print(f"   {'gradient <colors>':<18} {system.get_text('help_msg_gradient_desc')}")
+    print(f"   {'contrast [colors]':<18} {system.get_text('help_msg_contrast_desc')}")
     
-    input_desc = SYSTEM.get_text('help_msg_input_desc')
+    input_desc = system.get_text('help_msg_input_desc')
     print(f"   {'inputs...':<18} {input_desc}")
     print("\n")
 
-class AestheticParser(argparse.ArgumentParser):
-    def error(self, message):
-        print(f"\n\033[91m{SYSTEM.get_text('err_general', message)}\033[0m")
-        print_aesthetic_help()
-        sys.exit(2)
+@lru_cache(maxsize=None)
+def aesthetic_parser_class() -> type:
+    import argparse
+
+    class AestheticParser(argparse.ArgumentParser):
+        def error(self, message):
+            print(f"\n\033[91m{get_system().get_text('err_general', message)}\033[0m")
+            print_aesthetic_help()
+            sys.exit(2)
+
+        def print_help(self, file=None):
+            print_aesthetic_help()
 
-    def print_help(self, file=None):
-        print_aesthetic_help()
+    return AestheticParser
 
 class AnsiFactory:
     def __init__(self, profile: ProgrammingProfile):
         self.profile = profile
+        self.quantizer = get_quantizer(profile.depth)
+        self.format_code = profile.compile()
 
-    def generate(self, rgb: tuple[int, int, int]) -> str:
+    def body(self, rgb: tuple[int, int, int]) -> str:
+        if self.quantizer is not None:
+            return self.quantizer.body(rgb)
         r, g, b = rgb
-        code_body = f"38;2;{r};{g};{b}"
-        return self.profile.format(code_body)
+        return f"38;2;{r};{g};{b}"
+
+    def generate(self, rgb: tuple[int, int, int]) -> str:
+        return self.format_code(self.body(rgb))
 
     def get_preview_str(self, rgb: tuple[int, int, int]) -> str:
+        if self.quantizer is not None:
+            return f"\033[{self.quantizer.body(rgb)}m"
         r, g, b = rgb
         return f"\033[38;2;{r};{g};{b}m"
 
-def print_result_line(idx: int, profile_name: str, disp_name: str, code_inner: str, preview_block: str, label_padding: int, theme_ansi: str):
+def format_result_line(idx: int, profile_name: str, disp_name: str, code_inner: str, preview_block: str, label_padding: int, theme_ansi: str) -> str:
     white = "\033[97m"
     reset = "\033[0m"
     
@@ -290,14 +1017,26 @@ def print_result_line(idx: int, profile_name: str, disp_name: str, code_inner: s
     eq_str = f"{theme_ansi}={reset}"
     code_str = f'{theme_ansi}"{reset}{white}{code_inner}{reset}{theme_ansi}"{reset}'
     
-    print(f"{idx_str} {prof_str} {hex_str}{str_pad_left} {eq_str} {str_pad_right}{code_str}{code_pad_str}   {preview_block}")
+    return f"{idx_str} {prof_str} {hex_str}{str_pad_left} {eq_str} {str_pad_right}{code_str}{code_pad_str}   {preview_block}"
 
-def get_github_link_msg(pack_code: str) -> str:
+def print_result_line(idx: int, profile_name: str, disp_name: str, code_inner: str, preview_block: str, label_padding: int, theme_ansi: str, out: TextIO | None = None):
+    print(format_result_line(idx, profile_name, disp_name, code_inner, preview_block, label_padding, theme_ansi), file=out)
+
+def get_github_link_msg(pack_code: str, system: SystemManager | None = None) -> str:
     link = f"https://github.com/SparkCry/ColorGenerator/blob/main/ColorGenerator/assets/pack_{pack_code}.json"
-    return SYSTEM.get_text('missing_pack_msg', pack_code.upper(), pack_code, link)
+    return (system or get_system()).get_text('missing_pack_msg', pack_code.upper(), pack_code, link)
+
+def render_key(token: str, factory: AnsiFactory, reset: str, system: SystemManager) -> tuple[str, str, int, str, str]:
+    return (system.current_pack, factory.profile.id, factory.profile.depth, reset, token.strip().lower())
 
-def process_token(token: str, factory: AnsiFactory, reset: str) -> tuple[str, str, str, str] | None:
-    res = SYSTEM.resolve_color(token)
+def process_token(token: str, factory: AnsiFactory, reset: str, system: SystemManager | None = None, err: TextIO | None = None, warn: bool = True) -> tuple[str, str, str, str] | None:
+    system = system or get_system()
+    key = render_key(token, factory, reset, system)
+    cached = system.render_cache.get(key)
+    if cached is not LRUCache.MISSING:
+        return cached
+
+    res = system.resolve_color(token)
     
     if res:
         hex_str, rgb = res
@@ -305,21 +1044,554 @@ def process_token(token: str, factory: AnsiFactory, reset: str) -> tuple[str, st
         
         code_inner = factory.generate(rgb)
         block = factory.get_preview_str(rgb) + "█████" + reset
-        return (factory.profile.name, disp_name, code_inner, block)
+        result = (factory.profile.name, disp_name, code_inner, block)
+        system.render_cache.put(key, result)
+        return result
     else:
-        detected_pack = SYSTEM.detect_potential_pack(token)
-        if detected_pack and not SYSTEM.is_file_pack_present(detected_pack):
-            msg = get_github_link_msg(detected_pack)
-            print(f"\033[93m{msg}\033[0m", file=sys.stderr)
-            return None
-            
-        warn_msg = SYSTEM.get_text('warning', token)
-        print(f"\033[93m{warn_msg}\033[0m", file=sys.stderr)
+        if warn:
+            warn_unresolved(token, system, err)
         return None
 
+def unresolved_message(token: str, system: SystemManager | None = None) -> tuple[str, str | None]:
+    system = system or get_system()
+    detected_pack = system.detect_potential_pack(token)
+    if detected_pack and not system.is_file_pack_present(detected_pack):
+        return get_github_link_msg(detected_pack, system), detected_pack
+    return system.get_text('warning', token), None
+
+def warn_unresolved(token: str, system: SystemManager | None = None, err: TextIO | None = None):
+    msg, _ = unresolved_message(token, system)
+    print(f"\033[93m{msg}\033[0m", file=err or sys.stderr)
+
+class BulkEngine:
+    def __init__(self, system: SystemManager):
+        self.system = system
+        self._palette_key = None
+        self._names = None
+        self._name_hex = None
+        self._name_rgb = None
+        self._token_limit = 7
+        self._nibbles = None
+
+    @property
+    def available(self) -> bool:
+        if self._nibbles is None and load_numpy() is not None:
+            digits = "0123456789abcdef"
+            self._nibbles = np.full(128, -1, dtype=np.int16)
+            self._nibbles[[ord(c) for c in digits]] = np.arange(16)
+            self._hex_chars = np.array([ord(c) for c in digits], dtype=np.uint32)
+            self._dec = np.array([str(i) for i in range(256)])
+        return self._nibbles is not None
+
+    def _index_palette(self):
+        key = (self.system.current_pack, id(self.system.colors))
+        if self._palette_key == key:
+            return
+
+        palette = self.system.colors
+        names = palette.names
+        hexes = [hex_val for _, hex_val in palette.items()]
+        if palette.irregular:
+            rgb, _, _ = self.parse_hex([h if len(h) <= 7 else '' for h in (h.strip().lower() for h in hexes)])
+        else:
+            packed = np.frombuffer(palette.packed, dtype=np.uint32) if names else np.zeros(0, dtype=np.uint32)
+            rgb = np.stack([(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF], axis=1).astype(np.uint8)
+
+        self._names = np.array(names if names else [''])
+        self._name_hex = np.array(hexes if hexes else [''], dtype=object)
+        self._name_rgb = rgb if names else np.zeros((1, 3), dtype=np.uint8)
+        self._token_limit = max(7, self._names.dtype.itemsize // 4)
+        self._palette_key = key
+
+    def parse_hex(self, clean: Any) -> tuple[Any, Any, Any]:
+        arr = np.asarray(clean, dtype=str)
+        n = len(arr)
+        if n == 0:
+            return np.zeros((0, 3), dtype=np.uint8), np.zeros(0, dtype=bool), np.zeros(0, dtype='<U7')
+
+        width = max(arr.dtype.itemsize // 4, 7)
+        codes = arr.astype(f'<U{width}').view(np.uint32).reshape(n, width)
+        lengths = np.char.str_len(arr)
+
+        has_hash = codes[:, 0] == ord('#')
+        body_len = lengths - has_hash
+        short = body_len == 3
+        valid = short | (body_len == 6)
+
+        spread = np.where(short[:, None], np.array([0, 0, 1, 1, 2, 2]), np.arange(6))
+        chars = np.take_along_axis(codes, spread + has_hash[:, None], axis=1)
+        nib = self._nibbles[np.minimum(chars, 127)]
+        nib[chars > 127] = -1
+        valid &= (nib >= 0).all(axis=1)
+        nib[~valid] = 0
+
+        rgb = (nib[:, 0::2] * 16 + nib[:, 1::2]).astype(np.uint8)
+
+        hex_codes = np.empty((n, 7), dtype=np.uint32)
+        hex_codes[:, 0] = ord('#')
+        hex_codes[:, 1:] = self._hex_chars[nib]
+        hex_strs = hex_codes.view('<U7').reshape(n)
+        return rgb, valid, hex_strs
+
+    def resolve(self, tokens: list[str]) -> tuple[list[str | None], Any]:
+        if not tokens:
+            return [], np.zeros((0, 3), dtype=np.uint8)
+
+        self._index_palette()
+        limit = self._token_limit
+        oversized = [i for i, token in enumerate(tokens) if len(token) > limit]
+        if not oversized:
+            return self._resolve_batch(tokens)
+
+        regular = [i for i, token in enumerate(tokens) if len(token) <= limit]
+        batch_hex, batch_rgb = self._resolve_batch([tokens[i] for i in regular])
+        out_hex: list[str | None] = [None] * len(tokens)
+        rgb = np.zeros((len(tokens), 3), dtype=np.uint8)
+        for j, i in enumerate(regular):
+            out_hex[i] = batch_hex[j]
+        rgb[regular] = batch_rgb
+        for i in oversized:
+            found = self.system.resolve_color(tokens[i])
+            if found is not None:
+                out_hex[i], rgb[i] = found
+        return out_hex, rgb
+
+    def _resolve_batch(self, tokens: list[str]) -> tuple[list[str | None], Any]:
+        if not tokens:
+            return [], np.zeros((0, 3), dtype=np.uint8)
+
+        clean = np.char.lower(np.char.strip(np.asarray(tokens, dtype=str)))
+
+        pos = np.searchsorted(self._names, clean)
+        pos = np.minimum(pos, len(self._names) - 1)
+        named = self._names[pos] == clean
+
+        rgb, valid, hex_strs = self.parse_hex(clean)
+        valid &= ~named
+
+        rgb[named] = self._name_rgb[pos[named]]
+        out_hex = hex_strs.astype(object)
+        out_hex[named] = self._name_hex[pos[named]]
+        missing = ~(named | valid)
+        out_hex[missing] = None
+        if missing.any():
+            pack_index = self.system.pack_index
+            for i in np.flatnonzero(missing).tolist():
+                found = pack_index.resolve(str(clean[i]))
+                if found is not None:
+                    out_hex[i], rgb[i] = found
+        return out_hex.tolist(), rgb
+
+    def bodies(self, rgb: Any, factory: AnsiFactory) -> Any:
+        if factory.quantizer is not None:
+            return factory.quantizer.bodies(rgb)
+        r, g, b = (self._dec[rgb[:, i]] for i in range(3))
+        return np.char.add(np.char.add(np.char.add(np.char.add(np.char.add("38;2;", r), ";"), g), ";"), b)
+
+    def generate(self, rgb: Any, factory: AnsiFactory, reset: str, preview: bool = True) -> tuple[list[str], list[str] | None]:
+        if len(rgb) == 0:
+            return [], [] if preview else None
+
+        body = self.bodies(rgb, factory)
+        codes = self.wrap(body, factory.profile)
+        if not preview:
+            return codes, None
+        return codes, self.previews(body, reset)
+
+    def wrap(self, body: Any, profile: ProgrammingProfile) -> list[str]:
+        return np.char.add(np.char.add(profile.prefix, body), profile.suffix).tolist()
+
+    def previews(self, body: Any, reset: str) -> list[str]:
+        return np.char.add(np.char.add("\033[", body), "m█████" + reset).tolist()
+
+def process_tokens(tokens: list[str], factory: AnsiFactory, reset: str, system: SystemManager | None = None, err: TextIO | None = None, warn: bool = True) -> list[tuple[str, str, str, str] | None]:
+    system = system or get_system()
+    engine = system.bulk_engine
+    if len(tokens) < BULK_MIN_BATCH or not engine.available:
+        return [process_token(token, factory, reset, system, err, warn) for token in tokens]
+
+    cache = system.render_cache
+    keys = [render_key(token, factory, reset, system) for token in tokens]
+    results: list[Any] = [cache.get(key) for key in keys]
+    pending = [i for i, result in enumerate(results) if result is LRUCache.MISSING]
+
+    if pending:
+        hexes, rgb = engine.resolve([tokens[i] for i in pending])
+        found = [j for j, h in enumerate(hexes) if h is not None]
+        codes, blocks = engine.generate(rgb[found], factory, reset)
+
+        for i in pending:
+            results[i] = None
+
+        name = factory.profile.name
+        for j, code_inner, block in zip(found, codes, blocks):
+            i = pending[j]
+            results[i] = (name, hexes[j], code_inner, block)
+            cache.put(keys[i], results[i])
+
+    if warn:
+        for token, result in zip(tokens, results):
+            if result is None:
+                warn_unresolved(token, system, err)
+    return results
+
+def resolve_bodies(tokens: list[str], factory: AnsiFactory, system: SystemManager | None = None, err: TextIO | None = None, warn: bool = True) -> list[tuple[str, tuple[int, int, int], str] | None]:
+    system = system or get_system()
+    engine = system.bulk_engine
+
+    if len(tokens) >= BULK_MIN_BATCH and engine.available:
+        hexes, rgb = engine.resolve(tokens)
+        found = [i for i, h in enumerate(hexes) if h is not None]
+        bodies = engine.bodies(rgb[found], factory).tolist() if found else []
+
+        resolved: list[Any] = [None] * len(tokens)
+        for i, rgb_row, body in zip(found, rgb[found].tolist(), bodies):
+            resolved[i] = (hexes[i], tuple(rgb_row), body)
+    else:
+        resolved = []
+        for token in tokens:
+            res = system.resolve_color(token)
+            resolved.append((res[0], res[1], factory.body(res[1])) if res else None)
+
+    if warn:
+        for token, entry in zip(tokens, resolved):
+            if entry is None:
+                warn_unresolved(token, system, err)
+    return resolved
+
+def convert_tokens(tokens: list[str], factories: list[AnsiFactory], system: SystemManager | None = None, err: TextIO | None = None) -> list[tuple[str, tuple[int, int, int], str, str]]:
+    system = system or get_system()
+    engine = system.bulk_engine
+
+    if len(tokens) < BULK_MIN_BATCH or not engine.available:
+        formatters = [(factory.profile.id, factory.format_code) for factory in factories]
+        return [(h, rgb, pid, format_code(body))
+                for entry in resolve_bodies(tokens, factories[0], system, err) if entry
+                for h, rgb, body in (entry,)
+                for pid, format_code in formatters]
+
+    hexes, rgb = engine.resolve(tokens)
+    found = [i for i, h in enumerate(hexes) if h is not None]
+    for i, h in enumerate(hexes):
+        if h is None:
+            warn_unresolved(tokens[i], system, err)
+    if not found:
+        return []
+
+    bodies = engine.bodies(rgb[found], factories[0])
+    found_hex = [hexes[i] for i in found]
+    found_rgb = [tuple(row) for row in rgb[found].tolist()]
+    columns = [zip(found_hex, found_rgb, [f.profile.id] * len(found), engine.wrap(bodies, f.profile))
+               for f in factories]
+    if len(columns) == 1:
+        return list(columns[0])
+    return [record for group in zip(*columns) for record in group]
+
+@dataclass(frozen=True)
+class ConversionResult:
+    index: int
+    token: str
+    hex: str
+    rgb: tuple[int, int, int]
+    profile: str
+    code: str
+
+@dataclass(frozen=True)
+class ConversionError:
+    index: int
+    token: str
+    message: str
+    missing_pack: str | None = None
+
+class ColorConverter:
+    def __init__(self, pack: str = 'en', profile: str | ProgrammingProfile = 'python', depth: int = 24, chunk_size: int = FORMAT_WINDOW):
+        if isinstance(profile, str):
+            if profile not in TARGET_PROFILES:
+                raise ValueError(f"unknown profile: {profile}; choose from {', '.join(TARGET_PROFILES)}")
+            profile = TARGET_PROFILES[profile]
+        if depth not in COLOR_DEPTHS:
+            raise ValueError(f"unsupported color depth: {depth}; choose from {', '.join(map(str, COLOR_DEPTHS))}")
+
+        self.profile = profile.with_depth(depth)
+        self.chunk_size = max(1, chunk_size)
+        self._lock = threading.Lock()
+        self._system = SystemManager(config={})
+        if pack != 'en' and not self._system.is_file_pack_present(pack):
+            raise ValueError(self._system.get_text('err_pack_missing', pack))
+        self._system.load_pack(pack)
+        self._factory = AnsiFactory(self.profile)
+
+    @property
+    def pack(self) -> str:
+        return self._system.current_pack
+
+    def convert(self, token: str) -> ConversionResult | ConversionError:
+        return self._convert_chunk([token], 0)[0]
+
+    def convert_many(self, tokens: Iterable[str]) -> Iterator[ConversionResult | ConversionError]:
+        source = iter(tokens)
+        index = 0
+        while True:
+            chunk = list(islice(source, self.chunk_size))
+            if not chunk:
+                return
+            yield from self._convert_chunk(chunk, index)
+            index += len(chunk)
+
+    def _convert_chunk(self, tokens: list[str], start: int) -> list[ConversionResult | ConversionError]:
+        system, factory = self._system, self._factory
+        with self._lock:
+            resolved = resolve_bodies(tokens, factory, system, warn=False)
+            errors = {i: unresolved_message(tokens[i], system) for i, entry in enumerate(resolved) if entry is None}
+
+        results: list[ConversionResult | ConversionError] = []
+        for i, (token, entry) in enumerate(zip(tokens, resolved)):
+            if entry is None:
+                results.append(ConversionError(start + i, token, *errors[i]))
+            else:
+                hex_val, rgb, body = entry
+                results.append(ConversionResult(start + i, token, hex_val, rgb, factory.profile.id, factory.format_code(body)))
+        return results
+
+def nearest_tokens(tokens: list[str], system: SystemManager | None = None, err: TextIO | None = None, target_pack: str | None = None) -> list[tuple[str, tuple[int, int, int], str, str, tuple[int, int, int], float] | None]:
+    system = system or get_system()
+    engine = system.bulk_engine
+    index = system.nearest_index_for(target_pack)
+
+    if len(tokens) >= BULK_MIN_BATCH and engine.available:
+        hexes, rgb = engine.resolve(tokens)
+        found = [i for i, h in enumerate(hexes) if h is not None]
+        matches = index.query_many(rgb[found])
+        rgbs = rgb[found].tolist()
+    else:
+        resolved = [system.resolve_color(token) for token in tokens]
+        hexes = [res[0] if res else None for res in resolved]
+        found = [i for i, res in enumerate(resolved) if res]
+        rgbs = [resolved[i][1] for i in found]
+        matches = [index.query(rgb_row) for rgb_row in rgbs]
+
+    records: list[Any] = [None] * len(tokens)
+    for i, rgb_row, match in zip(found, rgbs, matches):
+        if match is not None:
+            pos, distance = match
+            records[i] = (hexes[i], tuple(rgb_row), index.names[pos], index.hexes[pos], index.rgbs[pos], distance)
+
+    for token, record in zip(tokens, records):
+        if record is None:
+            warn_unresolved(token, system, err)
+    return records
+
+class PrettyRenderer:
+    window = STREAM_WINDOW
+
+    def __init__(self, profile: ProgrammingProfile | list[ProgrammingProfile], system: SystemManager | None = None, err: TextIO | None = None):
+        self.factories = [AnsiFactory(p) for p in as_profiles(profile)]
+        self.factory = self.factories[0]
+        self.system = system
+        self.err = err
+        self.reset = "\033[0m"
+        self.white = "\033[97m"
+        self.pieces = {f.profile.name: self.row_pieces(f.profile) for f in self.factories}
+        self.head, self.label_close, self.eq, self.code_open, self.code_close = self.pieces[self.factory.profile.name]
+
+    def row_pieces(self, profile: ProgrammingProfile) -> tuple[str, str, str, str, str]:
+        white, reset = self.white, self.reset
+        theme = profile.get_theme_ansi()
+        return (
+            f"{reset} {theme}{profile.name}{reset} {theme}({reset}{white}",
+            f"{reset}{theme}){reset}",
+            f" {theme}={reset} ",
+            f'{theme}"{reset}{white}',
+            f'{reset}{theme}"{reset}'
+        )
+
+    def header(self) -> str:
+        return "\n"
+
+    def footer(self) -> str:
+        return "\n"
+
+    def format_tails(self, rows: list[tuple[str, str, str, str]], label_padding: int | None = None, pieces: tuple[str, str, str, str, str] | None = None) -> list[str]:
+        if label_padding is None:
+            label_padding = max(len(p) + len(d) + 3 for p, d, _, _ in rows)
+
+        head, label_close, eq, code_open, code_close = pieces or (self.head, self.label_close, self.eq, self.code_open, self.code_close)
+        tails = []
+        for p_name, d_name, c_inner, blk in rows:
+            total_pad = max(0, label_padding - len(p_name) - len(d_name) - 3)
+            pad_left = total_pad // 2
+            code_pad = max(0, 28 - len(c_inner))
+            tails.append(f"{head}{d_name}{label_close}{' ' * pad_left}{eq}{' ' * (total_pad - pad_left)}{code_open}{c_inner}{code_close}{' ' * code_pad}   {blk}\n")
+        return tails
+
+    def number_lines(self, tails: list[str], start_idx: int) -> str:
+        white = self.white
+        return "".join([f"{white}{idx:>4}:{tail}" for idx, tail in enumerate(tails, start_idx)])
+
+    def render_rows(self, rows: list[tuple[str, str, str, str]], start_idx: int, label_padding: int | None = None) -> str:
+        return self.number_lines(self.format_tails(rows, label_padding), start_idx)
+
+    def prepare(self, tokens: list[str]) -> tuple[list[str], int]:
+        if len(self.factories) > 1:
+            return self.prepare_profiles(tokens)
+        rows = [r for r in process_tokens(tokens, self.factory, self.reset, self.system, self.err) if r]
+        return (self.format_tails(rows), len(rows)) if rows else ([], 0)
+
+    def prepare_profiles(self, tokens: list[str]) -> tuple[list[str], int]:
+        resolved = [r for r in resolve_bodies(tokens, self.factory, self.system, self.err) if r]
+        if not resolved:
+            return [], 0
+
+        reset = self.reset
+        blocks = [f"\033[{body}m█████{reset}" for _, _, body in resolved]
+        label_padding = max(len(f.profile.name) for f in self.factories) + max(len(h) for h, _, _ in resolved) + 3
+
+        columns = []
+        for factory in self.factories:
+            name, format_code = factory.profile.name, factory.format_code
+            rows = [(name, h, format_code(body), block) for (h, _, body), block in zip(resolved, blocks)]
+            columns.append(self.format_tails(rows, label_padding, self.pieces[name]))
+        tails = [tail for group in zip(*columns) for tail in group]
+        return tails, len(tails)
+
+    def finish(self, prepared: list[str], start_idx: int) -> str:
+        return self.number_lines(prepared, start_idx)
+
+    def render(self, tokens: list[str], start_idx: int) -> tuple[str, int]:
+        prepared, count = self.prepare(tokens)
+        return self.finish(prepared, start_idx), count
+
+class RecordRenderer:
+    window = FORMAT_WINDOW
+
+    def __init__(self, profile: ProgrammingProfile | list[ProgrammingProfile], system: SystemManager | None = None, err: TextIO | None = None):
+        self.factories = [AnsiFactory(p) for p in as_profiles(profile)]
+        self.factory = self.factories[0]
+        self.system = system
+        self.err = err
+
+    def header(self) -> str:
+        return ""
+
+    def footer(self) -> str:
+        return ""
+
+    def render_records(self, records: list[tuple[str, tuple[int, int, int], str, str]], start_idx: int) -> str:
+        raise NotImplementedError
+
+    def prepare(self, tokens: list[str]) -> tuple[str, int]:
+        records = convert_tokens(tokens, self.factories, self.system, self.err)
+        return (self.render_records(records, 1), len(records)) if records else ("", 0)
+
+    def finish(self, prepared: str, start_idx: int) -> str:
+        return prepared
+
+    def render(self, tokens: list[str], start_idx: int) -> tuple[str, int]:
+        return self.prepare(tokens)
+
+class RawRenderer(RecordRenderer):
+    def render_records(self, records: list[tuple[str, tuple[int, int, int], str, str]], start_idx: int) -> str:
+        return "".join(f"{h}\t{r},{g},{b}\t{pid}\t{code}\n" for h, (r, g, b), pid, code in records)
+
+class JsonlRenderer(RecordRenderer):
+    def render_records(self, records: list[tuple[str, tuple[int, int, int], str, str]], start_idx: int) -> str:
+        return "".join(f'{{"hex": "{h}", "rgb": [{r}, {g}, {b}], "profile": "{pid}", "code": {json.dumps(code)}}}\n'
+                       for h, (r, g, b), pid, code in records)
+
+class CsvRenderer(RecordRenderer):
+    def header(self) -> str:
+        return "hex,r,g,b,profile,code\r\n"
+
+    def render_records(self, records: list[tuple[str, tuple[int, int, int], str, str]], start_idx: int) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows((h, r, g, b, pid, code) for h, (r, g, b), pid, code in records)
+        return buffer.getvalue()
+
+OUTPUT_FORMATS = {
+    'pretty': PrettyRenderer,
+    'raw': RawRenderer,
+    'jsonl': JsonlRenderer,
+    'csv': CsvRenderer
+}
+
+class NearestRenderer(RecordRenderer):
+    def __init__(self, profile: ProgrammingProfile | list[ProgrammingProfile], system: SystemManager | None = None, err: TextIO | None = None, target_pack: str | None = None):
+        super().__init__(profile, system, err)
+        self.target_pack = target_pack
+
+    def prepare(self, tokens: list[str]) -> tuple[Any, int]:
+        records = [r for r in nearest_tokens(tokens, self.system, self.err, self.target_pack) if r]
+        return self.render_records(records, 1), len(records)
+
+class NearestPrettyRenderer(NearestRenderer):
+    window = STREAM_WINDOW
+
+    def __init__(self, profile: ProgrammingProfile | list[ProgrammingProfile], system: SystemManager | None = None, err: TextIO | None = None, target_pack: str | None = None):
+        super().__init__(profile, system, err, target_pack)
+        self.white = "\033[97m"
+        self.reset = "\033[0m"
+        self.theme = self.factory.profile.get_theme_ansi()
+
+    def header(self) -> str:
+        return "\n"
+
+    def footer(self) -> str:
+        return "\n"
+
+    def render_records(self, records: list[tuple[str, tuple[int, int, int], str, str, tuple[int, int, int], float]], start_idx: int) -> list[str]:
+        white, reset, theme = self.white, self.reset, self.theme
+        width = (self.system or get_system()).nearest_index_for(self.target_pack).name_width
+        preview = self.factory.get_preview_str
+        tails = []
+        for h, rgb, name, name_hex, name_rgb, distance in records:
+            tails.append(f"{reset} {white}{h}{reset} {theme}~{reset} {white}{name:<{width}}{reset} {theme}({reset}{white}{name_hex}{reset}{theme}){reset}"
+                         f"  {theme}dE{reset} {distance:.4f}   {preview(rgb)}█████{reset} {preview(name_rgb)}█████{reset}\n")
+        return tails
+
+    def finish(self, prepared: list[str], start_idx: int) -> str:
+        white = self.white
+        return "".join([f"{white}{idx:>4}:{tail}" for idx, tail in enumerate(prepared, start_idx)])
+
+    def render(self, tokens: list[str], start_idx: int) -> tuple[str, int]:
+        prepared, count = self.prepare(tokens)
+        return self.finish(prepared, start_idx), count
+
+class NearestRawRenderer(NearestRenderer):
+    def render_records(self, records: list[tuple[str, tuple[int, int, int], str, str, tuple[int, int, int], float]], start_idx: int) -> str:
+        return "".join(f"{h}\t{r},{g},{b}\t{name}\t{name_hex}\t{distance:.6f}\n" for h, (r, g, b), name, name_hex, _, distance in records)
+
+class NearestJsonlRenderer(NearestRenderer):
+    def render_records(self, records: list[tuple[str, tuple[int, int, int], str, str, tuple[int, int, int], float]], start_idx: int) -> str:
+        return "".join(f'{{"hex": "{h}", "rgb": [{r}, {g}, {b}], "name": {json.dumps(name)}, "name_hex": "{name_hex}", "distance": {distance:.6f}}}\n'
+                       for h, (r, g, b), name, name_hex, _, distance in records)
+
+class NearestCsvRenderer(NearestRenderer):
+    def header(self) -> str:
+        return "hex,r,g,b,name,name_hex,distance\r\n"
+
+    def render_records(self, records: list[tuple[str, tuple[int, int, int], str, str, tuple[int, int, int], float]], start_idx: int) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows((h, r, g, b, name, name_hex, f"{distance:.6f}") for h, (r, g, b), name, name_hex, _, distance in records)
+        return buffer.getvalue()
+
+NEAREST_FORMATS = {
+    'pretty': NearestPrettyRenderer,
+    'raw': NearestRawRenderer,
+    'jsonl': NearestJsonlRenderer,
+    'csv': NearestCsvRenderer
+}
+
+def make_renderer(fmt: str, profile: ProgrammingProfile | list[ProgrammingProfile], system: SystemManager | None = None, err: TextIO | None = None, nearest: bool = False, target_pack: str | None = None) -> Any:
+    if nearest or target_pack:
+        return NEAREST_FORMATS[fmt](profile, system, err, target_pack)
+    return OUTPUT_FORMATS[fmt](profile, system, err)
+
 def check_for_updates(silent=False, manual_request=False):
+    import urllib.request
     if not silent:
-        print(f"\033[96m{SYSTEM.get_text('msg_checking_updates')}\033[0m")
+        print(f"\033[96m{get_system().get_text('msg_checking_updates')}\033[0m")
     
     try:
         timeout = 3 if silent else 10
@@ -327,64 +1599,220 @@ def check_for_updates(silent=False, manual_request=False):
             if response.status == 200:
                 new_code = response.read().decode('utf-8')
                 
-                ver_match = re.search(r'VERSION\s*=\s*"([^"]+)"', new_code)
+                ver_match = VERSION_PATTERN.search(new_code)
                 if ver_match:
                     new_ver = ver_match.group(1)
+                    UpdateChecker().store(new_ver)
                     if new_ver != VERSION:
-                        print(f"\033[92m{SYSTEM.get_text('msg_new_version', new_ver, VERSION)}\033[0m")
+                        print(f"\033[92m{get_system().get_text('msg_new_version', new_ver, VERSION)}\033[0m")
                         
                         try:
-                            choice = input(f"\033[93m{SYSTEM.get_text('msg_update_prompt')}\033[0m").strip().lower()
+                            choice = input(f"\033[93m{get_system().get_text('msg_update_prompt')}\033[0m").strip().lower()
                         except (EOFError, KeyboardInterrupt):
                             choice = 'n'
                         
                         if choice == 'y':
-                            print(f"\033[93m{SYSTEM.get_text('msg_updating')}\033[0m")
+                            print(f"\033[93m{get_system().get_text('msg_updating')}\033[0m")
                             try:
                                 with open(__file__, 'w', encoding='utf-8') as f:
                                     f.write(new_code)
-                                print(f"\033[92m{SYSTEM.get_text('msg_update_success')}\033[0m")
+                                print(f"\033[92m{get_system().get_text('msg_update_success')}\033[0m")
                                 sys.exit(0)
                             except Exception as e:
-                                print(f"\033[91m{SYSTEM.get_text('msg_write_error', e)}\033[0m")
+                                print(f"\033[91m{get_system().get_text('msg_write_error', e)}\033[0m")
                                 sys.exit(1)
                         else:
                             if manual_request: sys.exit(0)
                             return 
                     else:
                         if not silent:
-                            print(f"\033[92m{SYSTEM.get_text('msg_latest_version', VERSION)}\033[0m")
+                            print(f"\033[92m{get_system().get_text('msg_latest_version', VERSION)}\033[0m")
                             if manual_request: sys.exit(0)
                 else:
                     if not silent:
-                        print(f"\033[93m{SYSTEM.get_text('msg_ver_verify_error')}\033[0m")
+                        print(f"\033[93m{get_system().get_text('msg_ver_verify_error')}\033[0m")
             else:
                 if not silent:
-                    print(f"\033[91m{SYSTEM.get_text('msg_fetch_error', response.status)}\033[0m")
+                    print(f"\033[91m{get_system().get_text('msg_fetch_error', response.status)}\033[0m")
     except Exception as e:
         if not silent:
-            print(f"\033[91m{SYSTEM.get_text('msg_update_check_fail', e)}\033[0m")
+            print(f"\033[91m{get_system().get_text('msg_update_check_fail', e)}\033[0m")
     
     if manual_request:
         sys.exit(0)
 
-def interactive_mode(profile: ProgrammingProfile):
-    factory = AnsiFactory(profile)
+class UpdateChecker:
+    def __init__(self, url: str = UPDATE_URL, cache_path: Path = UPDATE_CACHE, ttl: float = UPDATE_TTL, timeout: float = 3, retry: float = UPDATE_RETRY):
+        self.url = url
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retry = retry
+
+    def read_cache(self) -> dict[str, Any] | None:
+        try:
+            with self.cache_path.open('r', encoding='utf-8') as f:
+                entry = json.load(f)
+            return entry if isinstance(entry, dict) else None
+        except Exception:
+            return None
+
+    def is_fresh(self, entry: dict[str, Any] | None) -> bool:
+        if not entry or entry.get('url') != self.url:
+            return False
+        age = time.time() - entry.get('checked_at', 0)
+        return 0 <= age < (min(self.retry, self.ttl) if entry.get('pending') else self.ttl)
+
+    def cached_version(self) -> str | None:
+        entry = self.read_cache()
+        return entry.get('version') if entry and entry.get('url') == self.url else None
+
+    def store(self, remote_version: str | None, pending: bool = False):
+        entry = {"url": self.url, "checked_at": time.time(), "version": remote_version}
+        if pending:
+            entry["pending"] = True
+        atomic_write(self.cache_path, json.dumps(entry).encode('utf-8'))
+
+    def fetch_remote_version(self) -> str | None:
+        import urllib.request
+        request = urllib.request.Request(self.url, headers={'Range': f'bytes=0-{UPDATE_PROBE_BYTES - 1}'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status not in (200, 206):
+                return None
+            head = response.read(UPDATE_PROBE_BYTES).decode('utf-8', errors='replace')
+
+        ver_match = VERSION_PATTERN.search(head)
+        return ver_match.group(1) if ver_match else None
+
+    def refresh(self, previous: str | None = None):
+        try:
+            remote_version = self.fetch_remote_version()
+        except Exception:
+            remote_version = previous
+        self.store(remote_version)
+
+    def start(self) -> threading.Thread | None:
+        entry = self.read_cache()
+        if self.is_fresh(entry):
+            return None
+        previous = entry.get('version') if entry and entry.get('url') == self.url else None
+        self.store(previous, pending=True)
+        thread = threading.Thread(target=self.refresh, args=(previous,), name='cgen-update-check', daemon=True)
+        thread.start()
+        import atexit
+        atexit.register(thread.join, UPDATE_EXIT_WAIT)
+        return thread
+
+def notify_cached_update(checker: UpdateChecker):
+    remote_version = checker.cached_version()
+    checker.start()
+
+    if remote_version and remote_version != VERSION:
+        print(f"\033[92m{get_system().get_text('msg_new_version', remote_version, VERSION)}\033[0m")
+        print(f"\033[92m{get_system().get_text('msg_update_hint')}\033[0m")
+
+class InteractiveSession:
+    def __init__(self, profile: ProgrammingProfile, system: SystemManager | None = None, out: TextIO | None = None, spec: RandomSpec | None = None):
+        import random
+        self.system = system or get_system()
+        self.spec = spec or RandomSpec()
+        self.rng = random.Random(self.spec.seed)
+        self.renderer = PrettyRenderer(profile, self.system)
+        self.factory = self.renderer.factory
+        self.reset = self.renderer.reset
+        self.out = out or sys.stdout
+        self.memo = LRUCache('session', INTERACTIVE_MEMO_SIZE)
+        self.counter = 1
+        self.label_width = INTERACTIVE_LABEL_WIDTH
+        self.limit_warning: str | None = None
+
+    def expand(self, raw_inputs: list[str]) -> Iterator[str]:
+        random_cmd_executed = False
+        i = 0
+        while i < len(raw_inputs):
+            token = raw_inputs[i]
+
+            if token.lower() == 'random':
+                count = 1
+                consumed = 1
+
+                if i + 1 < len(raw_inputs) and raw_inputs[i + 1].isdigit():
+                    count = int(raw_inputs[i + 1])
+                    consumed += 1
+
+                i += consumed
+                if not random_cmd_executed:
+                    random_cmd_executed = True
+                    rand_colors, self.limit_warning = generate_random_inputs(self.system, count, spec=self.spec, rng=self.rng)
+                    yield from rand_colors
+                continue
+
+            yield token
+            i += 1
+
+    def resolve(self, tokens: list[str]) -> list[tuple[str, str, str, str]]:
+        memo = self.memo
+        rows = [memo.get(token) for token in tokens]
+        pending = [i for i, row in enumerate(rows) if row is LRUCache.MISSING]
+
+        if pending:
+            unique = list(dict.fromkeys(tokens[i] for i in pending))
+            fresh = dict(zip(unique, process_tokens(unique, self.factory, self.reset, self.system, warn=False)))
+            for token, row in fresh.items():
+                if row is not None:
+                    memo.put(token, row)
+            for i in pending:
+                rows[i] = fresh[tokens[i]]
+                if rows[i] is None:
+                    warn_unresolved(tokens[i], self.system)
+        return [row for row in rows if row]
+
+    def render_chunk(self, tokens: list[str]) -> int:
+        rows = self.resolve(tokens)
+        if not rows:
+            return 0
+
+        self.label_width = max([self.label_width] + [len(p) + len(d) + 3 for p, d, _, _ in rows])
+        text = self.renderer.render_rows(rows, self.counter, self.label_width)
+        self.out.write(text)
+        self.counter += len(rows)
+        self.out.flush()
+        return len(rows)
+
+    def run_line(self, user_input: str) -> int:
+        tokens = self.expand(user_input.replace(',', ' ').split())
+        self.limit_warning = None
+        done = 0
+
+        try:
+            while True:
+                chunk = list(islice(tokens, INTERACTIVE_CHUNK))
+                if not chunk:
+                    break
+                done += self.render_chunk(chunk)
+        except KeyboardInterrupt:
+            self.out.flush()
+            print(f"\n\033[93m{self.system.get_text('msg_batch_cancelled', done)}\033[0m", file=self.out)
+
+        if self.limit_warning:
+            print(f"\033[93m{self.limit_warning}\033[0m", file=self.out)
+        return done
+
+def interactive_mode(profile: ProgrammingProfile, spec: RandomSpec | None = None):
+    session = InteractiveSession(profile, spec=spec)
     theme = profile.get_theme_ansi()
     reset = "\033[0m"
     white = "\033[97m"
     
-    txt_mode = SYSTEM.get_text('color_mode', profile.name)
+    txt_mode = get_system().get_text('color_mode', profile.name)
     
     print(f"{white}{'='*30}{reset}")
     print(f"{theme}    {txt_mode} {reset}")
     print(f"{white}{'='*30}{reset}" + "\n")
     
-    counter = 1
-    
     while True:
         try:
-            prompt_txt = SYSTEM.get_text('prompt')
+            prompt_txt = get_system().get_text('prompt')
             user_input = input(f"{theme}{prompt_txt} {reset}")
             
             print("\033[1A\033[2K", end="")
@@ -396,73 +1824,15 @@ def interactive_mode(profile: ProgrammingProfile):
             if not user_input.strip():
                 continue
 
-            sanitized_input = user_input.replace(',', ' ')
-            raw_inputs = sanitized_input.split()
-
-            line_results = [] 
-            random_cmd_executed = False
-            limit_warning = None 
-
-            i = 0
-            while i < len(raw_inputs):
-                token = raw_inputs[i]
-                
-                if token.lower() == 'random':
-                    count = 1
-                    consumed = 1  
-                    
-                    if i + 1 < len(raw_inputs) and raw_inputs[i+1].isdigit():
-                        count = int(raw_inputs[i+1])
-                        consumed += 1 
-                    
-                    if random_cmd_executed:
-                        i += consumed
-                        continue
-
-                    random_cmd_executed = True
-
-                    limit = SYSTEM.get_config_val('random-limit', 100)
-                    if count > limit:
-                        SYSTEM.save_random_limit(limit)
-                        limit_warning = SYSTEM.get_text('security_limit_msg', limit)
-                        count = limit
-
-                    for _ in range(count):
-                        rgb_tuple = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-                        hex_str = "#{:02x}{:02x}{:02x}".format(*rgb_tuple)
-                        
-                        code_inner = factory.generate(rgb_tuple)
-                        block = factory.get_preview_str(rgb_tuple) + "█████" + reset
-                        line_results.append((profile.name, hex_str, code_inner, block))
-                    
-                    i += consumed
-                    continue
-
-                result = process_token(token, factory, reset)
-                if result:
-                    line_results.append(result)
-                
-                i += 1
-            
-            if line_results:
-                lengths = [len(f"{p} ({d})") for p, d, _, _ in line_results]
-                current_max_len = max([30] + lengths)
-                
-                for p_name, d_name, c_inner, blk in line_results:
-                    print_result_line(counter, p_name, d_name, c_inner, blk, current_max_len, theme)
-                    counter += 1
-
-            if limit_warning:
-                print(f"\033[93m{limit_warning}\033[0m")
+            session.run_line(user_input)
 
         except (KeyboardInterrupt, EOFError):
-            exit_msg = SYSTEM.get_text('exit_msg')
+            exit_msg = get_system().get_text('exit_msg')
             print(f"\n{theme}{exit_msg}{reset}")
             break
 
 def run_batch_mode(inputs: list[str], profile: ProgrammingProfile):
     factory = AnsiFactory(profile)
-    theme = profile.get_theme_ansi()
     reset = "\033[0m"
     
     results = [] 
@@ -473,8 +1843,7 @@ def run_batch_mode(inputs: list[str], profile: ProgrammingProfile):
         parts = [p.strip() for p in inp.replace(',', ' ').split()]
         flat_inputs.extend(parts)
 
-    for token in flat_inputs:
-        result = process_token(token, factory, reset)
+    for result in process_tokens(flat_inputs, factory, reset):
         if result:
             p_name, d_name, _, _ = result
             visible_label = f"{p_name} ({d_name})"
@@ -483,27 +1852,128 @@ def run_batch_mode(inputs: list[str], profile: ProgrammingProfile):
 
     if not results: return
 
-    print("") 
-    for idx, (p_name, d_name, c_inner, blk) in enumerate(results, 1):
-        print_result_line(idx, p_name, d_name, c_inner, blk, max_label_len, theme)
-    print("") 
+    renderer = PrettyRenderer(profile)
+    sys.stdout.write(renderer.header() + renderer.render_rows(results, 1, max_label_len) + renderer.footer())
 
-def main():
-    if os.name == 'nt':
-        os.system('')
+def iter_tokens(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        yield from line.replace(',', ' ').split()
 
-    parser = AestheticParser(
-        description="Color Generator ANSI",
-        formatter_class=argparse.RawTextHelpFormatter,
-        add_help=False 
-    )
-    
-    parser.add_argument('-h', '--help', action='help', help=argparse.SUPPRESS)
+def run_stream_mode(lines: Iterable[str], profile: ProgrammingProfile | list[ProgrammingProfile], window: int | None = None, system: SystemManager | None = None, out: TextIO | None = None, err: TextIO | None = None, fmt: str = 'pretty', nearest: bool = False, target_pack: str | None = None):
+    renderer = make_renderer(fmt, profile, system, err, nearest, target_pack)
+    window = window or renderer.window
+    out = out or sys.stdout
+
+    tokens = iter_tokens(lines)
+    idx = 1
+
+    while True:
+        chunk = list(islice(tokens, window))
+        if not chunk:
+            break
+
+        text, count = renderer.render(chunk, idx)
+        if count:
+            if idx == 1:
+                out.write(renderer.header())
+            out.write(text)
+            out.flush()
+            idx += count
+
+    if idx > 1:
+        out.write(renderer.footer())
+
+def bounded_map(executor: Executor, fn: Any, items: Iterable[Any], window: int) -> Iterator[Any]:
+    pending: deque[Any] = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+_WORKER_RENDERER = None
+
+def _init_render_worker(pack_code: str, profile: ProgrammingProfile | list[ProgrammingProfile], fmt: str, nearest: bool = False, target_pack: str | None = None, stats: bool = False):
+    global _WORKER_RENDERER
+    if stats:
+        STATS.enable()
+    get_system().load_pack(pack_code)
+    _WORKER_RENDERER = make_renderer(fmt, profile, get_system(), None, nearest, target_pack)
+    STATS.take()
+    get_system().take_cache_counts()
+
+def _render_worker_chunk(tokens: list[str]) -> tuple[str, Any, int, Any, dict[str, tuple[int, int]]]:
+    err = io.StringIO()
+    _WORKER_RENDERER.err = err
+    prepared, count = _WORKER_RENDERER.prepare(tokens)
+    return err.getvalue(), prepared, count, STATS.take() if STATS.enabled else None, get_system().take_cache_counts()
+
+def run_parallel_mode(lines: Iterable[str], profile: ProgrammingProfile | list[ProgrammingProfile], jobs: int, fmt: str = 'pretty', chunk_size: int = JOB_CHUNK, nearest: bool = False, target_pack: str | None = None):
+    from concurrent.futures import ProcessPoolExecutor
+    renderer = make_renderer(fmt, profile, None, None, nearest, target_pack)
+    out = sys.stdout
+    tokens = iter_tokens(lines)
+    chunks = iter(lambda: list(islice(tokens, chunk_size)), [])
+    idx = 1
+
+    with ProcessPoolExecutor(jobs, initializer=_init_render_worker, initargs=(get_system().current_pack, profile, fmt, nearest, target_pack, STATS.enabled)) as executor:
+        for warnings, prepared, count, timings, cache_counts in bounded_map(executor, _render_worker_chunk, chunks, jobs * 2):
+            if timings:
+                STATS.merge(*timings)
+            get_system().merge_cache_counts(cache_counts)
+            if warnings:
+                out.flush()
+                sys.stderr.write(warnings)
+            if count:
+                if idx == 1:
+                    out.write(renderer.header())
+                out.write(renderer.finish(prepared, idx))
+                idx += count
+
+    if idx > 1:
+        out.write(renderer.footer())
+
+def open_input_source(path: str | None, use_stdin: bool) -> Iterable[str] | None:
+    if path is None or path == '-':
+        return sys.stdin if (use_stdin or path == '-') else None
+
+    try:
+        return open(path, 'r', encoding='utf-8')
+    except OSError as e:
+        print(f"\033[91m{get_system().get_text('err_input_file', e)}\033[0m", file=sys.stderr)
+        sys.exit(1)
+
+def print_cache_stats(system: SystemManager | None = None, err: TextIO | None = None):
+    system = system or get_system()
+    for stats in system.cache_stats():
+        msg = system.get_text('msg_cache_stats', stats['name'], stats['hits'], stats['misses'], stats['hit_rate'], stats['size'], stats['maxsize'])
+        print(f"\033[96m{msg}\033[0m", file=err or sys.stderr)
+
+def add_conversion_arguments(parser: argparse.ArgumentParser, system: SystemManager):
     parser.add_argument('--pack', default=None, help='Set pack interface and colors')
     parser.add_argument('-r', '--random', nargs='?', const=1, type=int, metavar='N', help='Generate N random colors')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible random colors')
+    parser.add_argument('--strategy', choices=RANDOM_STRATEGIES, default='uniform', help='Random color strategy')
+    parser.add_argument('--lightness', type=parse_unit_interval, default=None, help='Fixed lightness (0-1) for hsl/oklch/golden')
+    parser.add_argument('--saturation', type=parse_unit_interval, default=0.7, help='Fixed saturation (0-1) for hsl/golden')
+    parser.add_argument('--chroma', type=parse_unit_interval, default=0.12, help='Fixed chroma (0-1) for oklch')
     
-    parser.add_argument('--update', action='store_true', help='Check and apply updates')
-    parser.add_argument('--version', action='store_true', help='Show version info')
+    parser.add_argument('--stdin', action='store_true', help='Stream colors from standard input')
+    parser.add_argument('--input', default=None, metavar='FILE', help='Stream colors from a file')
+
+    parser.add_argument('--cache-stats', action='store_true', help='Report resolver cache statistics')
+    add_output_arguments(parser, system)
+
+    parser.add_argument('inputs', nargs='*', help='List of colors (Hex or Name)')
+
+def add_output_arguments(parser: argparse.ArgumentParser, system: SystemManager):
+    parser.add_argument('--format', choices=list(OUTPUT_FORMATS), default='pretty', help='Output format')
+    parser.add_argument('--nearest', action='store_true', help='Name the closest palette color for each input')
+    parser.add_argument('--translate', default=None, metavar='PACK', help='Name each color with the closest color of another pack')
+    parser.add_argument('--depth', type=int, choices=COLOR_DEPTHS, default=24, help='Color depth: 24-bit, xterm-256 or 16 colors')
+    parser.add_argument('--profiles', type=parse_profile_list, default=None, metavar='LIST', help='Comma-separated profiles to emit in one pass')
+    parser.add_argument('--all-profiles', action='store_true', help='Emit every profile in one pass')
 
     group = parser.add_mutually_exclusive_group()
     
@@ -513,68 +1983,1399 @@ def main():
             action='store_const', 
             const=key, 
             dest='selected_profile',
-            help=SYSTEM.get_text('help_gen_profile', profile.name)
+            help=system.get_text('help_gen_profile', profile.name)
         )
 
-    parser.add_argument('inputs', nargs='*', help='List of colors (Hex or Name)')
+def select_pack(system: SystemManager, requested: str | None) -> str:
+    available_packs = system.get_available_packs()
+
+    if requested:
+        return requested
+    elif len(available_packs) == 1:
+        return available_packs[0]
+    elif len(available_packs) > 1:
+        return system.config.get('pack', 'en')
+    return 'en'
+
+def parse_unit_interval(value: str) -> float:
+    import argparse
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+    if not 0.0 <= number <= 1.0:
+        raise argparse.ArgumentTypeError(f"{value} is outside the range 0-1")
+    return number
+
+def parse_profile_list(value: str) -> list[str]:
+    import argparse
+    ids = [p.strip().lower() for p in value.split(',') if p.strip()]
+    unknown = [p for p in ids if p not in TARGET_PROFILES]
+    if unknown or not ids:
+        raise argparse.ArgumentTypeError(f"unknown profile(s): {', '.join(unknown)}; choose from {', '.join(TARGET_PROFILES)}")
+    return list(dict.fromkeys(ids))
+
+def select_profiles(system: SystemManager, args: argparse.Namespace) -> list[ProgrammingProfile]:
+    if args.all_profiles:
+        ids = list(TARGET_PROFILES)
+    elif args.profiles:
+        ids = args.profiles
+    else:
+        return [select_profile(system, args.selected_profile).with_depth(args.depth)]
+    return [TARGET_PROFILES[i].with_depth(args.depth) for i in ids]
+
+def select_profile(system: SystemManager, requested: str | None) -> ProgrammingProfile:
+    target_id = requested if requested else system.config.get('language', 'python')
+
+    if target_id not in TARGET_PROFILES:
+        target_id = 'python'
+    return TARGET_PROFILES[target_id]
+
+def srgb_to_linear(c: float) -> float:
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+def rgb_to_oklab(rgb: tuple[int, int, int]) -> tuple[float, float, float]:
+    r, g, b = (srgb_to_linear(c / 255) for c in rgb)
+    l_ = (0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b) ** (1 / 3)
+    m_ = (0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b) ** (1 / 3)
+    s_ = (0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b) ** (1 / 3)
+    return (
+        0.2104542553 * l_ + 0.7936177850 * m_ - 0.0040720468 * s_,
+        1.9779984951 * l_ - 2.4285922050 * m_ + 0.4505937099 * s_,
+        0.0259040371 * l_ + 0.7827717662 * m_ - 0.8086757660 * s_
+    )
+
+def rgb_to_oklab_array(rgb: Any) -> Any:
+    c = np.asarray(rgb, dtype=np.float64).reshape(-1, 3) / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    lms = np.cbrt(linear @ np.array([
+        [0.4122214708, 0.2119034982, 0.0883024619],
+        [0.5363325363, 0.6806995451, 0.2817188376],
+        [0.0514459929, 0.1073969566, 0.6299787005]
+    ]))
+    return lms @ np.array([
+        [0.2104542553, 1.9779984951, 0.0259040371],
+        [0.7936177850, -2.4285922050, 0.7827717662],
+        [-0.0040720468, 0.4505937099, -0.8086757660]
+    ])
+
+def linear_to_srgb(c: float) -> float:
+    return 12.92 * c if c <= 0.0031308 else 1.055 * c ** (1 / 2.4) - 0.055
+
+def oklab_to_rgb(lab: tuple[float, float, float]) -> tuple[int, int, int]:
+    L, a, b = lab
+    l_ = (L + 0.3963377774 * a + 0.2158037573 * b) ** 3
+    m_ = (L - 0.1055613458 * a - 0.0638541728 * b) ** 3
+    s_ = (L - 0.0894841775 * a - 1.2914855480 * b) ** 3
+    linear = (
+        4.0767416621 * l_ - 3.3077115913 * m_ + 0.2309699292 * s_,
+        -1.2684380046 * l_ + 2.6097574011 * m_ - 0.3413193965 * s_,
+        -0.0041960863 * l_ - 0.7034186147 * m_ + 1.7076147010 * s_
+    )
+    return tuple(round(min(max(linear_to_srgb(min(max(c, 0.0), 1.0)), 0.0), 1.0) * 255) for c in linear)
+
+def oklab_to_rgb_array(lab: Any) -> Any:
+    L, a, b = lab[:, 0], lab[:, 1], lab[:, 2]
+    lms = np.stack([
+        L + 0.3963377774 * a + 0.2158037573 * b,
+        L - 0.1055613458 * a - 0.0638541728 * b,
+        L - 0.0894841775 * a - 1.2914855480 * b
+    ], axis=1) ** 3
+    linear = lms @ np.array([
+        [4.0767416621, -1.2684380046, -0.0041960863],
+        [-3.3077115913, 2.6097574011, -0.7034186147],
+        [0.2309699292, -0.3413193965, 1.7076147010]
+    ])
+    linear = np.clip(linear, 0.0, 1.0)
+    srgb = np.where(linear <= 0.0031308, 12.92 * linear, 1.055 * linear ** (1 / 2.4) - 0.055)
+    return np.rint(np.clip(srgb, 0.0, 1.0) * 255).astype(np.uint8)
+
+def hsl_to_rgb_array(hue: Any, saturation: float, lightness: float) -> Any:
+    chroma = (1 - abs(2 * lightness - 1)) * saturation
+    k = (np.array([0.0, 8.0, 4.0]) + hue[:, None] * 12) % 12
+    channel = lightness - chroma / 2 * np.clip(np.minimum(k - 3, 9 - k), -1, 1)
+    return np.rint(np.clip(channel, 0.0, 1.0) * 255).astype(np.uint8)
+
+def rgb_array_to_hex(rgb: Any) -> list[str]:
+    packed = (rgb[:, 0].astype(np.uint32) << 16) | (rgb[:, 1].astype(np.uint32) << 8) | rgb[:, 2]
+    digits = np.array([ord(c) for c in "0123456789abcdef"], dtype=np.uint32)
+    shifts = np.array([20, 16, 12, 8, 4, 0], dtype=np.uint32)
+    chars = np.empty((len(rgb), 7), dtype=np.uint32)
+    chars[:, 0] = ord('#')
+    chars[:, 1:] = digits[(packed[:, None] >> shifts) & 0xF]
+    return chars.view('<U7').reshape(len(rgb)).tolist()
+
+class NearestIndex:
+    def __init__(self, names: list[str], hexes: list[str], rgbs: list[tuple[int, int, int]], grid: int = NEAREST_GRID):
+        self.names = names
+        self.hexes = hexes
+        self.rgbs = rgbs
+        self.points = [rgb_to_oklab(rgb) for rgb in rgbs]
+        self.name_width = max([len(n) for n in names] + [1])
+        self.grid = grid
+        self.lo = [lo for lo, _ in OKLAB_BOUNDS]
+        self.step = [(hi - lo) / grid for lo, hi in OKLAB_BOUNDS]
+        self.cells: dict[int, list[int]] = {}
+        self._lock = threading.Lock()
+        self._points = None
+        if load_numpy() is not None and self.points:
+            self._points = np.vstack([np.array(self.points, dtype=np.float64), np.full((1, 3), np.inf)])
+            self._table = np.full((grid ** 3, 1), len(self.points), dtype=np.int32)
+            self._filled = np.zeros(grid ** 3, dtype=bool)
+
+    @classmethod
+    def from_palette(cls, palette: PaletteStore, grid: int = NEAREST_GRID) -> 'NearestIndex':
+        names, hexes, rgbs, seen = [], [], [], set()
+        for i, name in enumerate(palette.names):
+            rgb = palette.rgb_at(i)
+            if rgb in seen:
+                continue
+            seen.add(rgb)
+            names.append(name)
+            hexes.append(palette.hex_at(i))
+            rgbs.append(rgb)
+        return cls(names, hexes, rgbs, grid)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def cell_of(self, point: tuple[float, float, float]) -> int:
+        grid = self.grid
+        cell = 0
+        for value, lo, step in zip(point, self.lo, self.step):
+            cell = cell * grid + min(max(int((value - lo) / step), 0), grid - 1)
+        return cell
+
+    def cell_box(self, cell: int) -> list[tuple[float, float]]:
+        grid = self.grid
+        coords = (cell // (grid * grid), cell // grid % grid, cell % grid)
+        return [(lo + i * step, lo + (i + 1) * step) for i, lo, step in zip(coords, self.lo, self.step)]
+
+    def candidates(self, cell: int) -> list[int]:
+        found = self.cells.get(cell)
+        if found is not None:
+            return found
+        if self._points is not None:
+            self._fill_cells(np.array([cell]))
+            return self.cells[cell]
+
+        near, far = [], []
+        box = self.cell_box(cell)
+        for point in self.points:
+            d_near = d_far = 0.0
+            for value, (lo, hi) in zip(point, box):
+                gap = lo - value if value < lo else (value - hi if value > hi else 0.0)
+                span = max(value - lo, hi - value)
+                d_near += gap * gap
+                d_far += span * span
+            near.append(d_near)
+            far.append(d_far)
+
+        bound = min(far)
+        found = self.cells[cell] = [i for i, d in enumerate(near) if d <= bound]
+        return found
+
+    def query(self, rgb: tuple[int, int, int]) -> tuple[int, float] | None:
+        if not self.points:
+            return None
+
+        point = rgb_to_oklab(rgb)
+        best, best_d = -1, math.inf
+        for i in self.candidates(self.cell_of(point)):
+            d = sum((a - b) ** 2 for a, b in zip(point, self.points[i]))
+            if d < best_d:
+                best, best_d = i, d
+        return best, math.sqrt(best_d)
+
+    def query_many(self, rgb: Any) -> list[tuple[int, float] | None]:
+        if self._points is None or len(rgb) == 0:
+            return [self.query(tuple(row)) for row in rgb]
+
+        best, dist = self.query_indices(rgb)
+        return list(zip(best.tolist(), np.sqrt(dist).tolist()))
+
+    def query_indices(self, rgb: Any) -> tuple[Any, Any]:
+        lab = rgb_to_oklab_array(rgb)
+        grid = self.grid
+        idx = np.clip(((lab - np.array(self.lo)) / np.array(self.step)).astype(np.int64), 0, grid - 1)
+        cells = (idx[:, 0] * grid + idx[:, 1]) * grid + idx[:, 2]
+        self._fill_cells(cells)
+
+        cand = self._table[cells]
+        dist = ((self._points[cand] - lab[:, None, :]) ** 2).sum(axis=2)
+        pick = dist.argmin(axis=1)
+        rows = np.arange(len(lab))
+        return cand[rows, pick], dist[rows, pick]
+
+    def _fill_cells(self, cells: Any):
+        if self._filled[cells].all():
+            return
+
+        with self._lock:
+            missing = cells[~self._filled[cells]]
+            if len(missing) > 0:
+                self._fill_missing(missing)
+
+    def _fill_missing(self, missing: Any):
+        points = self._points[:-1]
+        for cell in np.unique(missing).tolist():
+            box = np.array(self.cell_box(cell))
+            gap = np.maximum(np.maximum(box[:, 0] - points, points - box[:, 1]), 0.0)
+            span = np.maximum(points - box[:, 0], box[:, 1] - points)
+            cand = np.flatnonzero((gap ** 2).sum(axis=1) <= (span ** 2).sum(axis=1).min())
+
+            table = self._table
+            if len(cand) > table.shape[1]:
+                table = np.full((len(table), len(cand)), len(points), dtype=np.int32)
+                table[:, :self._table.shape[1]] = self._table
+            table[cell, :len(cand)] = cand
+            self._table = table
+            self.cells[cell] = cand.tolist()
+            self._filled[cell] = True
+
+def xterm_rgb(n: int) -> tuple[int, int, int]:
+    if n < 16:
+        return XTERM_BASIC_RGB[n]
+    if n < 232:
+        n -= 16
+        return (XTERM_CUBE_LEVELS[n // 36], XTERM_CUBE_LEVELS[n // 6 % 6], XTERM_CUBE_LEVELS[n % 6])
+    level = 8 + (n - 232) * 10
+    return (level, level, level)
+
+class DepthQuantizer:
+    def __init__(self, depth: int):
+        self.depth = depth
+        if depth == 16:
+            codes = range(16)
+            bodies = [str(30 + n) if n < 8 else str(82 + n) for n in codes]
+        else:
+            codes = range(16, 256)
+            bodies = [f"38;5;{n}" for n in codes]
+
+        rgbs = [xterm_rgb(n) for n in codes]
+        self.index = NearestIndex(bodies, ["#{:02x}{:02x}{:02x}".format(*rgb) for rgb in rgbs], rgbs)
+        self.body_array = np.array(bodies) if load_numpy() is not None else None
+
+    def body(self, rgb: tuple[int, int, int]) -> str:
+        return self.index.names[self.index.query(rgb)[0]]
+
+    def bodies(self, rgb: Any) -> Any:
+        return self.body_array[self.index.query_indices(rgb)[0]]
+
+QUANTIZERS: dict[int, DepthQuantizer] = {}
+QUANTIZER_LOCK = threading.Lock()
+
+def get_quantizer(depth: int) -> DepthQuantizer | None:
+    if depth == 24:
+        return None
+    quantizer = QUANTIZERS.get(depth)
+    if quantizer is None:
+        with QUANTIZER_LOCK:
+            quantizer = QUANTIZERS.get(depth)
+            if quantizer is None:
+                quantizer = QUANTIZERS[depth] = DepthQuantizer(depth)
+    return quantizer
+
+@dataclass
+class RandomSpec:
+    strategy: str = 'uniform'
+    seed: int | None = None
+    lightness: float | None = None
+    saturation: float = 0.7
+    chroma: float = 0.12
+
+    def hue_block(self, rng: random.Random, start: int, n: int, offset: float) -> list[float] | Any:
+        if self.strategy == 'golden':
+            if load_numpy() is not None:
+                return (offset + np.arange(start, start + n) * GOLDEN_RATIO_CONJUGATE) % 1.0
+            return [(offset + i * GOLDEN_RATIO_CONJUGATE) % 1.0 for i in range(start, start + n)]
+
+        data = rng.randbytes(2 * n)
+        if load_numpy() is not None:
+            return np.frombuffer(data, dtype='<u2') / 65536.0
+        return [int.from_bytes(data[i:i + 2], 'little') / 65536.0 for i in range(0, 2 * n, 2)]
+
+    def color_block(self, rng: random.Random, start: int, n: int, offset: float) -> list[str]:
+        if self.strategy == 'uniform':
+            digits = rng.randbytes(3 * n).hex()
+            return ["#" + digits[i:i + 6] for i in range(0, 6 * n, 6)]
+
+        hues = self.hue_block(rng, start, n, offset)
+        if self.strategy == 'oklch':
+            lightness = 0.7 if self.lightness is None else self.lightness
+            if load_numpy() is not None:
+                angle = hues * 2 * math.pi
+                lab = np.stack([np.full(n, lightness), self.chroma * np.cos(angle), self.chroma * np.sin(angle)], axis=1)
+                return rgb_array_to_hex(oklab_to_rgb_array(lab))
+            rgbs = [oklab_to_rgb((lightness, self.chroma * math.cos(h * 2 * math.pi), self.chroma * math.sin(h * 2 * math.pi))) for h in hues]
+        else:
+            lightness = 0.5 if self.lightness is None else self.lightness
+            if load_numpy() is not None:
+                return rgb_array_to_hex(hsl_to_rgb_array(hues, self.saturation, lightness))
+            rgbs = [tuple(round(min(max(c, 0.0), 1.0) * 255) for c in colorsys.hls_to_rgb(h, lightness, self.saturation)) for h in hues]
+        return ["#{:02x}{:02x}{:02x}".format(*rgb) for rgb in rgbs]
+
+def iter_random_colors(count: int, spec: RandomSpec | None = None, block: int = RANDOM_BLOCK, rng: random.Random | None = None) -> Iterator[str]:
+    import random
+    spec = spec or RandomSpec()
+    rng = rng or random.Random(spec.seed)
+    offset = rng.random()
+    done = 0
+
+    while done < count:
+        n = min(block, count - done)
+        yield from spec.color_block(rng, done, n, offset)
+        done += n
+
+def gradient_stops(rgbs: list[tuple[int, int, int]], space: str = 'oklab') -> list[tuple[float, float, float]]:
+    points = [rgb_to_oklab(rgb) for rgb in rgbs]
+    if space == 'oklab':
+        return points
+
+    lch = [(L, math.hypot(a, b), math.atan2(b, a)) for L, a, b in points]
+    hued = [i for i, (_, chroma, _) in enumerate(lch) if chroma > GRADIENT_ACHROMATIC]
+    stops: list[tuple[float, float, float]] = []
+    for i, (L, chroma, hue) in enumerate(lch):
+        if not hued:
+            hue = 0.0
+        elif chroma <= GRADIENT_ACHROMATIC:
+            hue = lch[min(hued, key=lambda j: abs(j - i))][2]
+        if stops:
+            hue = stops[-1][2] + (hue - stops[-1][2] + math.pi) % (2 * math.pi) - math.pi
+        stops.append((L, chroma, hue))
+    return stops
+
+def gradient_block(stops: list[tuple[float, float, float]], space: str, start: int, count: int, steps: int) -> list[str]:
+    segments = len(stops) - 1
+    scale = segments / max(steps - 1, 1)
+
+    if load_numpy() is not None:
+        points = np.array(stops, dtype=np.float64)
+        t = np.arange(start, start + count, dtype=np.float64) * scale
+        seg = np.minimum(t.astype(np.intp), segments - 1)
+        frac = (t - seg)[:, None]
+        mixed = points[seg] * (1 - frac) + points[seg + 1] * frac
+        if space == 'oklch':
+            mixed = np.stack([mixed[:, 0], mixed[:, 1] * np.cos(mixed[:, 2]), mixed[:, 1] * np.sin(mixed[:, 2])], axis=1)
+        return rgb_array_to_hex(oklab_to_rgb_array(mixed))
+
+    hexes = []
+    for i in range(start, start + count):
+        t = i * scale
+        seg = min(int(t), segments - 1)
+        frac = t - seg
+        L, x, y = (p * (1 - frac) + q * frac for p, q in zip(stops[seg], stops[seg + 1]))
+        if space == 'oklch':
+            x, y = x * math.cos(y), x * math.sin(y)
+        hexes.append("#{:02x}{:02x}{:02x}".format(*oklab_to_rgb((L, x, y))))
+    return hexes
+
+def iter_gradient(rgbs: list[tuple[int, int, int]], steps: int, space: str = 'oklab', block: int = RANDOM_BLOCK) -> Iterator[str]:
+    stops = gradient_stops(rgbs, space)
+    for start in range(0, steps, block):
+        yield from gradient_block(stops, space, start, min(block, steps - start), steps)
+
+class ContrastMatrix:
+    def __init__(self, fg: list[tuple[str, str, tuple[int, int, int]]], bg: list[tuple[str, str, tuple[int, int, int]]] | None = None, large: bool = False, block_cells: int = CONTRAST_BLOCK_CELLS):
+        self.fg = fg
+        self.bg = fg if bg is None else bg
+        self.pairwise = bg is None
+        self.aa, self.aaa = (CONTRAST_LEVELS[level][1 if large else 0] for level in ('aa', 'aaa'))
+        self.block_cells = block_cells
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def linear_table() -> list[float]:
+        return [srgb_to_linear(c / 255) for c in range(256)]
+
+    def luminance(self, colors: list[tuple[str, str, tuple[int, int, int]]]) -> Any:
+        table = self.linear_table()
+        if load_numpy() is not None:
+            rgb = np.array([rgb for _, _, rgb in colors], dtype=np.intp).reshape(-1, 3)
+            return np.array(table)[rgb] @ np.array([0.2126, 0.7152, 0.0722])
+        return [0.2126 * table[r] + 0.7152 * table[g] + 0.0722 * table[b] for _, _, (r, g, b) in colors]
+
+    def blocks(self, low: float = 0.0, high: float = math.inf) -> Iterator[tuple[list[int], list[int], list[float], tuple[int, int, int]]]:
+        fg, bg = self.luminance(self.fg), self.luminance(self.bg)
+        n, m = len(fg), len(bg)
+        rows = max(1, self.block_cells // max(m, 1))
+
+        for start in range(0, n, rows):
+            stop = min(n, start + rows)
+            offset = start + 1 if self.pairwise else 0
+            if load_numpy() is not None:
+                a, b = fg[start:stop, None], bg[None, offset:]
+                ratio = (np.maximum(a, b) + 0.05) / (np.minimum(a, b) + 0.05)
+                if self.pairwise:
+                    ratio[np.arange(offset, m)[None, :] <= np.arange(start, stop)[:, None]] = np.nan
+                    pairs = int(np.count_nonzero(~np.isnan(ratio)))
+                else:
+                    pairs = ratio.size
+                counts = (pairs, int(np.count_nonzero(ratio >= self.aa)), int(np.count_nonzero(ratio >= self.aaa)))
+                r, c = np.nonzero((ratio >= low) & (ratio < high))
+                yield (r + start).tolist(), (c + offset).tolist(), ratio[r, c].tolist(), counts
+                continue
+
+            hit_rows, hit_cols, hit_ratios = [], [], []
+            pairs = aa = aaa = 0
+            for i in range(start, stop):
+                for j in range(i + 1 if self.pairwise else 0, m):
+                    x, y = fg[i], bg[j]
+                    ratio = (x + 0.05) / (y + 0.05) if x >= y else (y + 0.05) / (x + 0.05)
+                    pairs += 1
+                    aa += ratio >= self.aa
+                    aaa += ratio >= self.aaa
+                    if low <= ratio < high:
+                        hit_rows.append(i)
+                        hit_cols.append(j)
+                        hit_ratios.append(ratio)
+            yield hit_rows, hit_cols, hit_ratios, (pairs, aa, aaa)
+
+    def header(self, fmt: str) -> str:
+        return "fg,fg_hex,bg,bg_hex,ratio,aa,aaa\r\n" if fmt == 'csv' else ""
+
+    def labels(self, colors: list[tuple[str, str, tuple[int, int, int]]], fmt: str, side: str) -> list[str]:
+        if fmt == 'jsonl':
+            return [f'"{side}": {json.dumps(name)}, "{side}_hex": "{hex_val}"' for name, hex_val, _ in colors]
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows((name, hex_val) for name, hex_val, _ in colors)
+        return buffer.getvalue().split("\n")[:-1]
+
+    def render(self, fmt: str = 'csv', low: float = 0.0, high: float = math.inf, counts: list[int] | None = None) -> Iterator[str]:
+        fg_labels = self.labels(self.fg, fmt, 'fg')
+        bg_labels = fg_labels if self.pairwise and fmt == 'csv' else self.labels(self.bg, fmt, 'bg')
+        aa, aaa = self.aa, self.aaa
+        if fmt == 'jsonl':
+            suffixes = ('"aa": false, "aaa": false}\n', '"aa": true, "aaa": false}\n', '"aa": true, "aaa": true}\n')
+        else:
+            suffixes = ("false,false\r\n", "true,false\r\n", "true,true\r\n")
+        totals = counts if counts is not None else [0, 0, 0, 0]
+
+        for rows, cols, ratios, block_counts in self.blocks(low, high):
+            for k, value in enumerate(block_counts):
+                totals[k] += value
+            totals[3] += len(ratios)
+            if fmt == 'jsonl':
+                yield "".join(f'{{{fg_labels[i]}, {bg_labels[j]}, "ratio": {int(r * 100) / 100:.2f}, {suffixes[(r >= aa) + (r >= aaa)]}'
+                              for i, j, r in zip(rows, cols, ratios))
+            else:
+                yield "".join(f'{fg_labels[i]},{bg_labels[j]},{int(r * 100) / 100:.2f},{suffixes[(r >= aa) + (r >= aaa)]}'
+                              for i, j, r in zip(rows, cols, ratios))
+
+def random_spec_from_args(args: argparse.Namespace) -> RandomSpec:
+    return RandomSpec(args.strategy, args.seed, args.lightness, args.saturation, args.chroma)
+
+def generate_random_inputs(system: SystemManager, count: int, persist: bool = True, spec: RandomSpec | None = None, unlimited: bool = False, rng: random.Random | None = None) -> tuple[Iterator[str], str | None]:
+    limit = system.get_config_val('random-limit', 100)
+    limit_warning = None
+    
+    if count > limit and not unlimited:
+        if persist:
+            system.save_random_limit(limit)
+        limit_warning = system.get_text('security_limit_msg', limit)
+        count = limit
+        
+    return iter_random_colors(count, spec, rng=rng), limit_warning
+
+def default_server_address() -> str:
+    import socket
+    return f"unix:{CACHE_DIR / 'cgen.sock'}" if hasattr(socket, 'AF_UNIX') else "127.0.0.1:47823"
+
+def parse_server_address(address: str) -> tuple[int, Any]:
+    import socket
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+@lru_cache(maxsize=None)
+def request_parser_class() -> type:
+    import argparse
+
+    class RequestParser(argparse.ArgumentParser):
+        def error(self, message):
+            raise ValueError(message)
+
+    return RequestParser
+
+class FrameWriter:
+    def __init__(self, writer: asyncio.StreamWriter, channel: str):
+        self.writer = writer
+        self.channel = channel
+
+    def write(self, text: str) -> int:
+        if text:
+            self.writer.write(json.dumps({self.channel: text}).encode('utf-8') + b"\n")
+        return len(text)
+
+    def flush(self):
+        pass
+
+class ConversionServer:
+    def __init__(self, address: str):
+        self.address = address
+        self.systems: dict[str, SystemManager] = {}
+        self.parser = request_parser_class()(add_help=False)
+        add_conversion_arguments(self.parser, get_system())
+
+    def get_system(self, pack_code: str) -> SystemManager:
+        system = self.systems.get(pack_code)
+        if system is None:
+            system = SystemManager()
+            system.load_pack(pack_code)
+            self.systems[pack_code] = system
+        return system
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        out = FrameWriter(writer, 'o')
+        err = FrameWriter(writer, 'e')
+        status = 0
+
+        try:
+            header = json.loads(await reader.readline())
+            args = self.parser.parse_args(header.get('argv', []))
+            await self.run_request(args, reader, writer, out, err)
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"\033[91m{get_system().get_text('err_server_request', e)}\033[0m", file=err)
+            status = 2
+        except ConnectionError:
+            writer.close()
+            return
+
+        try:
+            writer.write(json.dumps({"exit": status}).encode('utf-8') + b"\n")
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def run_request(self, args: argparse.Namespace, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, out: FrameWriter, err: FrameWriter):
+        import asyncio
+        pack_code = select_pack(get_system(), args.pack)
+        if pack_code != 'en' and not get_system().is_file_pack_present(pack_code):
+            print(f"\033[93m{get_system().get_text('msg_pack_fallback', pack_code)}\033[0m", file=err)
+            pack_code = 'en'
+        system = self.get_system(pack_code)
+        profiles = select_profiles(system, args)
+        if args.translate and not system.is_file_pack_present(args.translate):
+            raise ValueError(system.get_text('err_translate_pack', args.translate))
+        renderer = make_renderer(args.format, profiles, system, err, args.nearest, args.translate)
+        window = renderer.window
+
+        tokens: deque[str] = deque()
+        pending: Iterator[str] = iter_tokens(args.inputs)
+        limit_warning = None
+        if args.random is not None:
+            rand_colors, limit_warning = generate_random_inputs(system, args.random, persist=False, spec=random_spec_from_args(args), unlimited=args.format != 'pretty')
+            pending = chain(pending, rand_colors)
+
+        streaming = args.stdin or args.input is not None
+        partial = b""
+        idx = 1
+
+        while True:
+            tokens.extend(islice(pending, window - len(tokens)))
+            while streaming and len(tokens) < window:
+                data = await reader.read(SOCKET_CHUNK)
+                if not data:
+                    streaming = False
+                    data, partial = partial, b""
+                else:
+                    data, _, partial = (partial + data).rpartition(b"\n")
+                tokens.extend(iter_tokens([data.decode('utf-8', errors='replace')]))
+
+            chunk = [tokens.popleft() for _ in range(min(window, len(tokens)))]
+            if not chunk:
+                break
+
+            text, count = renderer.render(chunk, idx)
+            if count:
+                if idx == 1:
+                    out.write(renderer.header())
+                out.write(text)
+                idx += count
+            await writer.drain()
+            await asyncio.sleep(0)
+
+        if idx > 1:
+            out.write(renderer.footer())
+        if limit_warning:
+            print(f"\033[93m{limit_warning}\033[0m", file=out if args.format == 'pretty' else err)
+        if args.cache_stats:
+            print_cache_stats(system, err)
+
+    async def serve_forever(self):
+        import asyncio
+        import socket
+        family, target = parse_server_address(self.address)
+        if family == socket.AF_INET:
+            server = await asyncio.start_server(self.handle_client, *target)
+        else:
+            sock_path = Path(target)
+            sock_path.parent.mkdir(parents=True, exist_ok=True)
+            if sock_path.exists():
+                sock_path.unlink()
+            server = await asyncio.start_unix_server(self.handle_client, path=target)
+
+        print(f"\033[96m{get_system().get_text('msg_server_listening', self.address)}\033[0m")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if family != socket.AF_INET:
+                try:
+                    Path(target).unlink()
+                except OSError:
+                    pass
+
+def run_server(address: str):
+    import asyncio
+    server = ConversionServer(address)
+    server.get_system(select_pack(get_system(), None))
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print(f"\n{get_system().get_text('exit_msg')}")
+
+def strip_client_args(argv: list[str]) -> list[str]:
+    forwarded = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+            continue
+        if arg in ('--connect', '--stats') or arg.startswith(('--address=', '--input=', '--jobs=', '--profile=')):
+            continue
+        if arg.startswith('-J') and len(arg) > 2:
+            continue
+        if arg in ('--address', '--input', '-J', '--jobs', '--profile'):
+            skip = True
+            continue
+        forwarded.append(arg)
+    return forwarded
+
+def run_client(address: str, argv: list[str], source: Iterable[str] | None) -> int:
+    import socket
+    family, target = parse_server_address(address)
+    forwarded = strip_client_args(argv)
+    if source is not None and '--stdin' not in forwarded:
+        forwarded.append('--stdin')
+
+    try:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.connect(target)
+    except OSError as e:
+        print(f"\033[91m{get_system().get_text('err_server_connect', address, e)}\033[0m", file=sys.stderr)
+        return 1
+
+    def send_input():
+        try:
+            if source is not None:
+                pending, size = [], 0
+                for line in source:
+                    pending.append(line if line.endswith("\n") else line + "\n")
+                    size += len(line)
+                    if size >= SOCKET_CHUNK:
+                        sock.sendall("".join(pending).encode('utf-8'))
+                        pending, size = [], 0
+                sock.sendall("".join(pending).encode('utf-8'))
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    with sock:
+        sock.sendall(json.dumps({"argv": forwarded}).encode('utf-8') + b"\n")
+        sender = threading.Thread(target=send_input, daemon=True)
+        sender.start()
+
+        status = 1
+        for line in sock.makefile('r', encoding='utf-8'):
+            frame = json.loads(line)
+            if 'o' in frame:
+                sys.stdout.write(frame['o'])
+            elif 'e' in frame:
+                sys.stdout.flush()
+                sys.stderr.write(frame['e'])
+            elif 'exit' in frame:
+                status = frame['exit']
+                break
+        sys.stdout.flush()
+    return status
+
+def build_escape_pattern() -> re.Pattern:
+    prefixes = sorted({p.prefix.encode() for p in TARGET_PROFILES.values()} | {b"\x1b["}, key=len, reverse=True)
+    leads: dict[bytes, list[bytes]] = {}
+    for prefix in prefixes:
+        leads.setdefault(prefix[:1], []).append(re.escape(prefix[1:]))
+
+    styles = b"|".join(b"(?<=" + re.escape(lead) + b")(?:" + b"|".join(rests) + b")" for lead, rests in leads.items())
+    first = re.escape(b"".join(leads)) + b"#"
+    return re.compile(b"[" + first + b"](?:(?:" + styles + rb")([0-9;]*)m|(?<=#)(?<![&\w]#)([0-9a-fA-F]{6}|[0-9a-fA-F]{3})(?![\w-]))", re.IGNORECASE)
+
+SCAN_PATTERN = build_escape_pattern()
+
+@lru_cache(maxsize=CACHE_SIZE)
+def decode_sgr(params: str) -> tuple[tuple[str, tuple[int, int, int]], ...]:
+    values = [int(v) if v else 0 for v in params.split(';')]
+    colors = []
+    i = 0
+    while i < len(values):
+        code = values[i]
+        if code in (38, 48) and i + 1 < len(values):
+            layer = 'fg' if code == 38 else 'bg'
+            if values[i + 1] == 2 and i + 4 < len(values):
+                rgb = tuple(values[i + 2:i + 5])
+                if all(v < 256 for v in rgb):
+                    colors.append((layer, rgb))
+                i += 5
+                continue
+            if values[i + 1] == 5 and i + 2 < len(values):
+                if values[i + 2] < 256:
+                    colors.append((layer, xterm_rgb(values[i + 2])))
+                i += 3
+                continue
+        elif 30 <= code <= 37 or 90 <= code <= 97:
+            colors.append(('fg', XTERM_BASIC_RGB[code - 30 if code < 90 else code - 82]))
+        elif 40 <= code <= 47 or 100 <= code <= 107:
+            colors.append(('bg', XTERM_BASIC_RGB[code - 40 if code < 100 else code - 92]))
+        i += 1
+    return tuple(colors)
+
+class IgnoreRules:
+    def __init__(self, patterns: Iterable[str]):
+        self.rules = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith('#'):
+                continue
+            negate = pattern.startswith('!')
+            pattern = pattern.lstrip('!')
+            dir_only = pattern.endswith('/')
+            pattern = pattern.strip('/')
+            self.rules.append((pattern, negate, dir_only, '/' in pattern))
+
+    @classmethod
+    def for_root(cls, root: Path, extra: list[str], use_defaults: bool = True) -> 'IgnoreRules':
+        patterns = list(SCAN_DEFAULT_IGNORES) if use_defaults else []
+        for name in ('.gitignore', '.cgenignore'):
+            try:
+                patterns.extend((root / name).read_text(encoding='utf-8', errors='replace').splitlines())
+            except OSError:
+                pass
+        return cls(patterns + extra)
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        name = rel_path.rsplit('/', 1)[-1]
+        result = False
+        for pattern, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if fnmatch.fnmatchcase(rel_path if anchored else name, pattern):
+                result = not negate
+        return result
+
+def walk_files(paths: list[str], ignore: list[str], use_defaults: bool = True, err: TextIO | None = None) -> Iterator[str]:
+    for path in paths:
+        root = Path(path)
+        if root.is_file():
+            yield str(root)
+            continue
+
+        rules = IgnoreRules.for_root(root, ignore, use_defaults)
+        stack = [(root, "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                entries = sorted(os.scandir(directory), key=lambda e: e.name)
+            except OSError as e:
+                print(f"\033[93m{get_system().get_text('err_scan_path', directory, e)}\033[0m", file=err or sys.stderr)
+                continue
+
+            subdirs = []
+            for entry in entries:
+                rel = prefix + entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    is_file = entry.is_file(follow_symlinks=False)
+                except OSError:
+                    continue
+                if rules.ignored(rel, is_dir):
+                    continue
+                if is_dir:
+                    subdirs.append((Path(entry.path), rel + "/"))
+                elif is_file:
+                    yield entry.path
+            stack.extend(reversed(subdirs))
+
+def decode_hex_literal(digits: str) -> tuple[int, int, int]:
+    if len(digits) == 3:
+        digits = "".join(c * 2 for c in digits)
+    value = int(digits, 16)
+    return (value >> 16, value >> 8 & 0xFF, value & 0xFF)
+
+def scan_buffer(mm: mmap.mmap) -> list[tuple[int, str, str, str, tuple[int, int, int]]]:
+    hits = []
+    for match in SCAN_PATTERN.finditer(mm):
+        start = match.start()
+        params, digits = match.group(1, 2)
+        if params is not None:
+            text = match.group(0).decode('latin-1')
+            for layer, rgb in decode_sgr(params.decode('latin-1')):
+                hits.append((start, 'escape', layer, text, rgb))
+        else:
+            hits.append((start, 'hex', 'literal', match.group(0).decode('latin-1'), decode_hex_literal(digits.decode('latin-1'))))
+    return hits
+
+def locate_offsets(mm: mmap.mmap, offsets: list[int]) -> list[tuple[int, int]]:
+    located = []
+    line, line_start, pos = 1, 0, 0
+    i = 0
+    while i < len(offsets):
+        window_end = min(max(pos + SCAN_WINDOW, offsets[i] + 1), len(mm))
+        chunk = mm[pos:window_end]
+        if load_numpy() is not None:
+            newlines = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10) + pos
+            j = i
+            while j < len(offsets) and offsets[j] < window_end:
+                j += 1
+            batch = np.array(offsets[i:j], dtype=np.int64)
+            k = np.searchsorted(newlines, batch)
+            starts = np.where(k > 0, newlines[np.maximum(k - 1, 0)] + 1 if len(newlines) else 0, line_start)
+            located.extend(zip((line + k).tolist(), (batch - starts + 1).tolist()))
+            i = j
+            if len(newlines):
+                line_start = int(newlines[-1]) + 1
+            line += len(newlines)
+        else:
+            while i < len(offsets) and offsets[i] < window_end:
+                before = chunk[:offsets[i] - pos]
+                k = before.count(b"\n")
+                start = pos + before.rfind(b"\n") + 1 if k else line_start
+                located.append((line + k, offsets[i] - start + 1))
+                i += 1
+            k = chunk.count(b"\n")
+            if k:
+                line_start = pos + chunk.rfind(b"\n") + 1
+            line += k
+        pos = window_end
+    return located
+
+def scan_file(path: str) -> tuple[str, list[tuple] | None, str | None]:
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return path, [], None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if b"\0" in mm[:SCAN_BINARY_PROBE]:
+                    return path, None, None
+                hits = scan_buffer(mm)
+                positions = locate_offsets(mm, [hit[0] for hit in hits])
+    except (OSError, ValueError) as e:
+        return path, None, str(e)
+
+    if not hits:
+        return path, [], None
+
+    index = get_system().nearest_index
+    rgbs = [hit[4] for hit in hits]
+    if not index.points:
+        matches = [None] * len(hits)
+    elif load_numpy() is not None:
+        matches = index.query_many(np.array(rgbs, dtype=np.uint8))
+    else:
+        matches = [index.query(rgb) for rgb in rgbs]
+
+    results = []
+    for (line, col), (_, kind, layer, text, rgb), match in zip(positions, hits, matches):
+        name = name_hex = distance = None
+        if match is not None:
+            name, name_hex, distance = index.names[match[0]], index.hexes[match[0]], match[1]
+        results.append((line, col, kind, layer, text, rgb, name, name_hex, distance))
+    return path, results, None
+
+def _init_scan_worker(pack_code: str):
+    get_system().load_pack(pack_code)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def json_string(text: str) -> str:
+    return json.dumps(text, ensure_ascii=False)
+
+def write_scan_result(out: TextIO, fmt: str, path: str, hits: list[tuple]):
+    if fmt == 'csv':
+        csv.writer(out).writerows((path, line, col, kind, layer, text, "#{:02x}{:02x}{:02x}".format(*rgb), *rgb, name or '', '' if distance is None else f"{distance:.6f}")
+                                  for line, col, kind, layer, text, rgb, name, name_hex, distance in hits)
+        return
+
+    entries = []
+    for line, col, kind, layer, text, (r, g, b), name, name_hex, distance in hits:
+        text = text.replace('\\', '\\\\').replace('\x1b', '\\u001b')
+        entry = f'{{"line": {line}, "col": {col}, "kind": "{kind}", "layer": "{layer}", "match": "{text}", "hex": "#{r:02x}{g:02x}{b:02x}", "rgb": [{r}, {g}, {b}]'
+        if name is not None:
+            entry += f', "name": {json_string(name)}, "name_hex": "{name_hex}", "distance": {distance:.6f}'
+        entries.append(entry + "}")
+    out.write(f'{{"path": {json.dumps(path, ensure_ascii=False)}, "count": {len(hits)}, "hits": [{", ".join(entries)}]}}\n')
+
+def scan_command(argv: list[str]) -> int:
+    import argparse
+    from concurrent.futures import ProcessPoolExecutor
+    parser = argparse.ArgumentParser(prog='CGen.py scan', description=get_system().get_text('help_msg_scan_desc'))
+    parser.add_argument('paths', nargs='+', help='Files or directories to scan')
+    parser.add_argument('--pack', default=None, help='Palette used to name colors')
+    parser.add_argument('--ignore', action='append', default=[], metavar='PATTERN', help='Extra ignore pattern (gitignore-style glob)')
+    parser.add_argument('--no-default-ignores', action='store_true', help='Do not skip .git, node_modules and similar directories')
+    parser.add_argument('-J', '--jobs', type=int, default=0, metavar='N', help='Worker processes (0 = all cores)')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl', help='Report format')
+    parser.add_argument('-o', '--output', default=None, metavar='FILE', help='Write the report to FILE')
+    parser.add_argument('--all', action='store_true', help='Also report files without hits')
+    args = parser.parse_args(argv)
+
+    get_system().load_pack(select_pack(get_system(), args.pack))
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    files = walk_files(args.paths, args.ignore, not args.no_default_ignores)
+
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    scanned = hit_files = hit_count = skipped = 0
+    try:
+        if args.format == 'csv':
+            csv.writer(out).writerow(['path', 'line', 'col', 'kind', 'layer', 'match', 'hex', 'r', 'g', 'b', 'name', 'distance'])
+
+        if jobs > 1:
+            executor = ProcessPoolExecutor(jobs, initializer=_init_scan_worker, initargs=(get_system().current_pack,))
+            results = bounded_map(executor, scan_file, files, jobs * 4)
+        else:
+            executor = None
+            results = map(scan_file, files)
+
+        try:
+            for path, hits, error in results:
+                if error:
+                    print(f"\033[93m{get_system().get_text('err_scan_path', path, error)}\033[0m", file=sys.stderr)
+                if hits is None:
+                    skipped += 1
+                    continue
+                scanned += 1
+                if hits or args.all:
+                    hit_files += bool(hits)
+                    hit_count += len(hits)
+                    write_scan_result(out, args.format, path, hits)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+
+    print(f"\033[96m{get_system().get_text('msg_scan_summary', scanned, hit_count, hit_files, skipped)}\033[0m", file=sys.stderr)
+    return 0
+
+def _diff_line(marker: bytes, line: bytes) -> bytes:
+    return marker + line if line.endswith(b"\n") else marker + line + b"\n\\ No newline at end of file\n"
+
+def unified_line_diff(path: str, before: list[bytes], after: list[bytes], changed: list[int], context: int = 3) -> bytes:
+    name = path.encode()
+    out = [b"--- " + name + b"\n", b"+++ " + name + b"\n"]
+    changed_set = set(changed)
+    i = 0
+    while i < len(changed):
+        j = i
+        while j + 1 < len(changed) and changed[j + 1] - changed[j] <= 2 * context:
+            j += 1
+        start, end = max(changed[i] - context, 0), min(changed[j] + context + 1, len(before))
+        span = b"%d" % (start + 1) if end - start == 1 else b"%d,%d" % (start + 1, end - start)
+        out.append(b"@@ -" + span + b" +" + span + b" @@\n")
+        k = start
+        while k < end:
+            if k in changed_set:
+                run_end = k
+                while run_end + 1 < end and run_end + 1 in changed_set:
+                    run_end += 1
+                out.extend(_diff_line(b"-", before[n]) for n in range(k, run_end + 1))
+                out.extend(_diff_line(b"+", after[n]) for n in range(k, run_end + 1))
+                k = run_end + 1
+            else:
+                out.append(_diff_line(b" ", before[k]))
+                k += 1
+        i = j + 1
+    return b"".join(out)
+
+class EscapeTranspiler:
+    def __init__(self, source: ProgrammingProfile, target: ProgrammingProfile):
+        self.source = source
+        self.target = target
+        self.marker = source.prefix.encode()
+        self.marker_pattern = re.compile(re.escape(self.marker), re.IGNORECASE)
+        self.leftover_pattern = re.compile(rb"(?<!\\)" + re.escape(self.marker), re.IGNORECASE)
+        self.pattern = re.compile(rb"(?<!\\)" + re.escape(self.marker) + rb"([0-9;?]*)([@-~])", re.IGNORECASE)
+        if source.suffix == target.suffix:
+            self.replacement = target.prefix.encode().replace(b"\\", b"\\\\") + rb"\1\2"
+        else:
+            self.replacement = self.rewrite_match
+
+    def rewrite_match(self, match: re.Match) -> bytes:
+        final = self.target.suffix.encode() if match[2] == self.source.suffix.encode() else match[2]
+        return self.target.prefix.encode() + match[1] + final
+
+    def rewrite_blocks(self, src: Any, window: int = SCAN_WINDOW) -> Iterator[tuple[bytes, int]]:
+        subn, replacement = self.pattern.subn, self.replacement
+        carry = b""
+        while block := src.read(window):
+            block = carry + block
+            cut = block.rfind(b"\n") + 1
+            if not cut:
+                carry = block
+                continue
+            carry = block[cut:]
+            yield subn(replacement, block[:cut])
+        if carry:
+            yield subn(replacement, carry)
+
+    def mentions_source(self, path: str) -> bool:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if b"\0" in mm[:SCAN_BINARY_PROBE]:
+                    return False
+                if mm.find(self.marker) >= 0:
+                    return True
+                return self.marker.lower() != self.marker.upper() and self.marker_pattern.search(mm) is not None
+
+    def leftover_lines(self, chunk: bytes, first_line: int) -> list[int]:
+        lines = []
+        pos, line = 0, first_line
+        for match in self.leftover_pattern.finditer(chunk):
+            line += chunk.count(b"\n", pos, match.start())
+            pos = match.start()
+            lines.append(line)
+        return lines
+
+    def transpile_file(self, path: str, dry_run: bool = False) -> tuple[str, int, bytes | None, str | None, list[int]]:
+        import shutil
+        try:
+            if not self.mentions_source(path):
+                return path, 0, None, None, []
+
+            with open(path, 'rb') as src:
+                if dry_run:
+                    data = src.read()
+                    rewritten, total = self.pattern.subn(self.replacement, data)
+                    leftovers = self.leftover_lines(rewritten, 1)
+                    if not total:
+                        return path, 0, None, None, leftovers
+                    before, after = list(io.BytesIO(data)), list(io.BytesIO(rewritten))
+                    changed = [index for index, (line, new_line) in enumerate(zip(before, after)) if line != new_line]
+                    return path, total, unified_line_diff(path, before, after, changed), None, leftovers
+
+                tmp_path = Path(path).with_name(f".{Path(path).name}.{os.getpid()}.tmp")
+                total = 0
+                leftovers: list[int] = []
+                line = 1
+                try:
+                    with open(tmp_path, 'wb') as dst:
+                        for chunk, count in self.rewrite_blocks(src):
+                            dst.write(chunk)
+                            total += count
+                            leftovers.extend(self.leftover_lines(chunk, line))
+                            line += chunk.count(b"\n")
+                    if total:
+                        shutil.copymode(path, tmp_path)
+                        os.replace(tmp_path, path)
+                finally:
+                    if tmp_path.exists():
+                        tmp_path.unlink()
+            return path, total, None, None, leftovers
+        except (OSError, ValueError) as e:
+            return path, 0, None, str(e), []
+
+_WORKER_TRANSPILER = None
+
+def _init_convert_worker(source_id: str, target_id: str):
+    global _WORKER_TRANSPILER
+    _WORKER_TRANSPILER = EscapeTranspiler(TARGET_PROFILES[source_id], TARGET_PROFILES[target_id])
+
+def _convert_worker_file(job: tuple[str, bool]) -> tuple[str, int, bytes | None, str | None, list[int]]:
+    return _WORKER_TRANSPILER.transpile_file(*job)
+
+def convert_command(argv: list[str]) -> int:
+    import argparse
+    from concurrent.futures import ProcessPoolExecutor
+    parser = argparse.ArgumentParser(prog='CGen.py convert', description=get_system().get_text('help_msg_convert_desc'))
+    parser.add_argument('paths', nargs='+', help='Files or directories to rewrite')
+    parser.add_argument('--from', dest='source', required=True, choices=list(TARGET_PROFILES), help='Profile syntax to rewrite')
+    parser.add_argument('--to', dest='target', required=True, choices=list(TARGET_PROFILES), help='Profile syntax to emit')
+    parser.add_argument('--dry-run', action='store_true', help='Print a unified diff instead of writing files')
+    parser.add_argument('--ignore', action='append', default=[], metavar='PATTERN', help='Extra ignore pattern (gitignore-style glob)')
+    parser.add_argument('--no-default-ignores', action='store_true', help='Do not skip .git, node_modules and similar directories')
+    parser.add_argument('-J', '--jobs', type=int, default=0, metavar='N', help='Worker processes (0 = all cores)')
+    args = parser.parse_args(argv)
+
+    source, target = TARGET_PROFILES[args.source], TARGET_PROFILES[args.target]
+    if source.prefix.lower() == target.prefix.lower() and source.suffix == target.suffix:
+        print(f"\033[93m{get_system().get_text('err_convert_same', source.name, target.name)}\033[0m", file=sys.stderr)
+        return 0
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    files = ((path, args.dry_run) for path in walk_files(args.paths, args.ignore, not args.no_default_ignores))
+
+    if jobs > 1:
+        executor = ProcessPoolExecutor(jobs, initializer=_init_convert_worker, initargs=(args.source, args.target))
+        results = bounded_map(executor, _convert_worker_file, files, jobs * 4)
+    else:
+        executor = None
+        transpiler = EscapeTranspiler(source, target)
+        results = (transpiler.transpile_file(*job) for job in files)
+
+    checked = changed = rewritten = 0
+    out = sys.stdout.buffer
+    try:
+        for path, count, diff, error, leftovers in results:
+            checked += 1
+            if error:
+                print(f"\033[93m{get_system().get_text('err_scan_path', path, error)}\033[0m", file=sys.stderr)
+                continue
+            for line in leftovers:
+                print(f"\033[93m{get_system().get_text('warn_convert_leftover', path, line, source.name)}\033[0m", file=sys.stderr)
+            if count:
+                changed += 1
+                rewritten += count
+            if diff:
+                out.write(diff)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        out.flush()
+
+    suffix = get_system().get_text('msg_convert_dry_run') if args.dry_run else ""
+    print(f"\033[96m{get_system().get_text('msg_convert_summary', checked, rewritten, changed, suffix)}\033[0m", file=sys.stderr)
+    return 0
+
+def gradient_command(argv: list[str]) -> int:
+    import argparse
+    system = get_system()
+    parser = argparse.ArgumentParser(prog='CGen.py gradient', description=system.get_text('help_msg_gradient_desc'))
+    parser.add_argument('stops', nargs='+', help='Two or more colors (Hex or Name)')
+    parser.add_argument('--steps', type=int, default=GRADIENT_STEPS, metavar='N', help='Number of colors to emit, stops included')
+    parser.add_argument('--space', choices=GRADIENT_SPACES, default='oklab', help='Interpolation space')
+    parser.add_argument('--pack', default=None, help='Pack used to resolve color names')
+    add_output_arguments(parser, system)
+    args = parser.parse_args(argv)
+
+    if len(args.stops) < 2:
+        parser.error("at least two colors are required")
+    if args.steps < 1:
+        parser.error("--steps must be at least 1")
+
+    system.load_pack(select_pack(system, args.pack))
+    if args.translate and not system.is_file_pack_present(args.translate):
+        print(f"\033[91m{system.get_text('err_translate_pack', args.translate)}\033[0m", file=sys.stderr)
+        return 1
+
+    rgbs = []
+    for stop in args.stops:
+        resolved = system.resolve_color(stop)
+        if resolved is None:
+            warn_unresolved(stop, system)
+            return 1
+        rgbs.append(resolved[1])
+
+    profiles = select_profiles(system, args)
+    profile = profiles[0] if len(profiles) == 1 else profiles
+    run_stream_mode(iter_gradient(rgbs, args.steps, args.space), profile, system=system, fmt=args.format, nearest=args.nearest, target_pack=args.translate)
+    return 0
+
+def resolve_contrast_colors(system: SystemManager, tokens: Iterable[str]) -> list[tuple[str, str, tuple[int, int, int]]]:
+    colors = []
+    for token in iter_tokens(tokens):
+        resolved = system.resolve_color(token)
+        if resolved is None:
+            warn_unresolved(token, system)
+        else:
+            colors.append((token, resolved[0], resolved[1]))
+    return colors
+
+def contrast_command(argv: list[str]) -> int:
+    import argparse
+    system = get_system()
+    parser = argparse.ArgumentParser(prog='CGen.py contrast', description=system.get_text('help_msg_contrast_desc'))
+    parser.add_argument('colors', nargs='*', help='Colors to check (default: the whole palette of the pack)')
+    parser.add_argument('--against', action='append', default=None, metavar='COLORS', help='Backgrounds to check against instead of every pair')
+    parser.add_argument('--pack', default=None, help='Pack used to resolve color names and as the default palette')
+    parser.add_argument('--level', choices=list(CONTRAST_LEVELS), default=None, help='Only emit pairs meeting this WCAG level')
+    parser.add_argument('--failing', action='store_true', help='Only emit pairs below the level (AA by default)')
+    parser.add_argument('--large', action='store_true', help='Use the large-text thresholds (AA 3:1, AAA 4.5:1)')
+    parser.add_argument('--format', choices=CONTRAST_FORMATS, default='csv', help='Output format')
+    args = parser.parse_args(argv)
+
+    system.load_pack(select_pack(system, args.pack))
+    if args.colors:
+        fg = resolve_contrast_colors(system, args.colors)
+    else:
+        palette = system.colors
+        fg = [(name, palette.hex_at(i), palette.rgb_at(i)) for i, name in enumerate(palette.names)]
+    bg = resolve_contrast_colors(system, args.against) if args.against else None
+
+    matrix = ContrastMatrix(fg, bg, args.large)
+    low, high = 0.0, math.inf
+    if args.level or args.failing:
+        threshold = matrix.aaa if args.level == 'aaa' else matrix.aa
+        low, high = (0.0, threshold) if args.failing else (threshold, math.inf)
+
+    counts = [0, 0, 0, 0]
+    out = sys.stdout
+    out.write(matrix.header(args.format))
+    for text in matrix.render(args.format, low, high, counts):
+        out.write(text)
+    out.flush()
+
+    print(f"\033[96m{system.get_text('msg_contrast_summary', *counts)}\033[0m", file=sys.stderr)
+    return 0
+
+SUBCOMMANDS = {
+    'scan': scan_command,
+    'convert': convert_command,
+    'gradient': gradient_command,
+    'contrast': contrast_command
+}
+
+def main():
+    if os.name == 'nt':
+        os.system('')
+
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        sys.exit(SUBCOMMANDS[sys.argv[1]](sys.argv[2:]))
+
+    import argparse
+
+    parser = aesthetic_parser_class()(
+        description="Color Generator ANSI",
+        formatter_class=argparse.RawTextHelpFormatter,
+        add_help=False 
+    )
+    
+    parser.add_argument('-h', '--help', action='help', help=argparse.SUPPRESS)
+
+    parser.add_argument('--serve', action='store_true', help='Run a warm conversion server')
+    parser.add_argument('--connect', action='store_true', help='Forward this conversion to a running server')
+    parser.add_argument('--address', default=None, help='Server address (unix:PATH or HOST:PORT)')
+
+    parser.add_argument('-J', '--jobs', type=int, default=1, metavar='N', help='Convert with N worker processes')
+
+    parser.add_argument('--stats', action='store_true', help='Report per-stage timings')
+    parser.add_argument('--profile', default=None, metavar='FILE', help='Write a cProfile dump')
+
+    parser.add_argument('--update', action='store_true', help='Check and apply updates')
+    parser.add_argument('--version', action='store_true', help='Show version info')
+
+    add_conversion_arguments(parser, SystemManager(config={}))
 
     args = parser.parse_args()
+    STATS.add('startup', time.perf_counter() - STARTUP_T0)
+
+    if args.stats:
+        STATS.enable()
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
 
+    try:
+        run_cli(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        if args.stats:
+            sys.stdout.flush()
+            STATS.report(get_system())
+
+def run_cli(args: argparse.Namespace):
     if args.version:
         print(f"CGen v{VERSION}")
         sys.exit(0)
+
+    system = get_system()
+    if args.serve or args.connect:
+        address = args.address or system.get_config_val('server-address') or default_server_address()
+
+    if args.serve:
+        run_server(address)
+        return
+
+    if args.connect:
+        source = open_input_source(args.input, args.stdin)
+        try:
+            sys.exit(run_client(address, sys.argv[1:], source))
+        finally:
+            if source is not None and source is not sys.stdin:
+                source.close()
         
     if args.update:
         check_for_updates(silent=False, manual_request=True)
 
-    if not args.update and SYSTEM.get_config_val('check-update', True):
+    if not args.update and system.get_config_val('check-update', True):
         if sys.stdout.isatty():
-            check_for_updates(silent=True, manual_request=False)
-
-    available_packs = SYSTEM.get_available_packs()
-    target_pack = 'en' 
+            with STATS.stage('update'):
+                notify_cached_update(UpdateChecker(ttl=system.get_config_val('update-ttl', UPDATE_TTL)))
 
+    target_pack = select_pack(system, args.pack)
     if args.pack:
-        target_pack = args.pack
-        SYSTEM.save_pack(target_pack)
-    elif len(available_packs) == 1:
-        target_pack = available_packs[0]
-    elif len(available_packs) > 1:
-        target_pack = SYSTEM.config.get('pack', 'en')
-
-    SYSTEM.load_pack(target_pack)
+        system.save_pack(target_pack)
 
-    target_id = args.selected_profile if args.selected_profile else SYSTEM.config.get('language', 'python')
+    system.load_pack(target_pack)
 
-    if target_id not in TARGET_PROFILES:
-        target_id = 'python'
+    profiles = select_profiles(system, args)
+    profile = profiles[0] if len(profiles) == 1 else profiles
         
     if args.selected_profile:
-        SYSTEM.save_profile(target_id)
-        
-    profile = TARGET_PROFILES[target_id]
+        system.save_profile(args.selected_profile)
 
     processed_inputs = args.inputs if args.inputs else []
+    random_inputs: Iterable[str] = []
     limit_warning = None 
 
     if args.random is not None:
-        count = args.random
-        limit = SYSTEM.get_config_val('random-limit', 100)
-        
-        if count > limit:
-            SYSTEM.save_random_limit(limit)
-            limit_warning = SYSTEM.get_text('security_limit_msg', limit)
-            count = limit
-            
-        rand_colors = [f"#{random.randint(0, 0xFFFFFF):06x}" for _ in range(count)]
-        processed_inputs.extend(rand_colors)
+        random_inputs, limit_warning = generate_random_inputs(system, args.random, spec=random_spec_from_args(args), unlimited=args.format != 'pretty')
+        if args.format == 'pretty':
+            processed_inputs.extend(random_inputs)
+            random_inputs = []
+
+    source = open_input_source(args.input, args.stdin)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    if args.translate and not system.is_file_pack_present(args.translate):
+        print(f"\033[91m{system.get_text('err_translate_pack', args.translate)}\033[0m", file=sys.stderr)
+        sys.exit(1)
 
-    if processed_inputs:
+    if source is not None or ((processed_inputs or args.random) and (args.format != 'pretty' or jobs > 1 or args.nearest or args.translate or len(profiles) > 1)):
+        lines = chain(processed_inputs, random_inputs, source or [])
+        try:
+            if jobs > 1:
+                if args.profile:
+                    print(f"\033[93m{system.get_text('warn_profile_jobs')}\033[0m", file=sys.stderr)
+                run_parallel_mode(lines, profile, jobs, fmt=args.format, nearest=args.nearest, target_pack=args.translate)
+            else:
+                run_stream_mode(lines, profile, fmt=args.format, nearest=args.nearest, target_pack=args.translate)
+        finally:
+            if source is not None and source is not sys.stdin:
+                source.close()
+        if limit_warning:
+            print(f"\033[93m{limit_warning}\033[0m", file=sys.stdout if args.format == 'pretty' else sys.stderr)
+    elif processed_inputs:
         run_batch_mode(processed_inputs, profile)
         if limit_warning:
             print(f"\033[93m{limit_warning}\033[0m")
     else:
-        interactive_mode(profile)
+        interactive_mode(profiles[0], random_spec_from_args(args))
+
+    if args.cache_stats:
+        print_cache_stats()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,520 @@
+import sys
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import CGen
+
+BENCH_DIR = Path(__file__).resolve().parent
+CGEN_MODULE = ['-m', 'CGen']
+DEFAULT_SEED = 1234
+DEFAULT_SIZE = 20000
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.25
+DEFAULT_STARTUP_BUDGET_MS = 100.0
+STARTUP_RUNS = 9
+STARTUP_BUDGET_COMMANDS = {'version': ['--version'], 'convert': ['-p', 'red']}
+DEFERRED_IMPORTS = ['numpy', 'asyncio', 'urllib.request', 'concurrent.futures', 'socket', 'hashlib']
+
+BenchCase = Callable[[], Callable[[], int]]
+
+@dataclass
+class BenchResult:
+    name: str
+    ops: int
+    runs: list[float] = field(default_factory=list)
+
+    @property
+    def best(self) -> float:
+        return min(self.runs)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.runs)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ops": self.ops,
+            "best_s": self.best,
+            "median_s": self.median,
+            "per_op_us": self.median / self.ops * 1e6 if self.ops else 0.0,
+            "runs": self.runs
+        }
+
+class BenchSuite:
+    def __init__(self, size: int = DEFAULT_SIZE, repeat: int = DEFAULT_REPEAT, seed: int = DEFAULT_SEED):
+        self.size = size
+        self.repeat = repeat
+        self.seed = seed
+        self.cases: dict[str, BenchCase] = {}
+        self.system = CGen.get_system()
+        self.system.load_pack('en')
+
+    def case(self, name: str) -> Callable[[BenchCase], BenchCase]:
+        def register(fn: BenchCase) -> BenchCase:
+            self.cases[name] = fn
+            return fn
+        return register
+
+    def hex_tokens(self) -> list[str]:
+        rng = random.Random(self.seed)
+        return [f"#{rng.randint(0, 0xFFFFFF):06x}" for _ in range(self.size)]
+
+    def named_tokens(self) -> list[str]:
+        rng = random.Random(self.seed)
+        names = sorted(self.system.colors)
+        return [rng.choice(names) for _ in range(self.size)]
+
+    def run(self, selected: list[str] | None = None) -> list[BenchResult]:
+        results = []
+        for name, setup in self.cases.items():
+            if selected and not any(pattern in name for pattern in selected):
+                continue
+
+            fn = setup()
+            if fn is None:
+                continue
+
+            result = BenchResult(name, 0)
+            for _ in range(self.repeat):
+                self.system.clear_caches()
+                with contextlib.redirect_stderr(io.StringIO()):
+                    start = time.perf_counter()
+                    result.ops = fn()
+                    result.runs.append(time.perf_counter() - start)
+
+            print(f"   {name:<40} {result.median / max(result.ops, 1) * 1e6:>10.3f} us/op   ({result.ops} ops)", file=sys.stderr)
+            results.append(result)
+        return results
+
+def build_suite(size: int, repeat: int, seed: int) -> BenchSuite:
+    suite = BenchSuite(size, repeat, seed)
+    system = suite.system
+    reset = "\033[0m"
+    python_factory = CGen.AnsiFactory(CGen.TARGET_PROFILES['python'])
+
+    for kind, make_tokens in (('hex', suite.hex_tokens), ('named', suite.named_tokens)):
+        @suite.case(f"resolve.scalar.{kind}")
+        def scalar_resolve(make_tokens=make_tokens):
+            tokens = make_tokens()
+            def run() -> int:
+                for token in tokens:
+                    system.resolve_color(token)
+                return len(tokens)
+            return run
+
+        @suite.case(f"resolve.scalar.{kind}.cached")
+        def cached_resolve(make_tokens=make_tokens):
+            tokens = make_tokens()[:256] * (suite.size // 256 or 1)
+            def run() -> int:
+                for token in tokens:
+                    system.resolve_color(token)
+                return len(tokens)
+            return run
+
+        @suite.case(f"resolve.bulk.{kind}")
+        def bulk_resolve(make_tokens=make_tokens):
+            if not system.bulk_engine.available:
+                return None
+            tokens = make_tokens()
+            def run() -> int:
+                system.bulk_engine.resolve(tokens)
+                return len(tokens)
+            return run
+
+    for profile_id, profile in CGen.TARGET_PROFILES.items():
+        @suite.case(f"process_token.{profile_id}")
+        def scalar_profile(profile=profile):
+            tokens = suite.hex_tokens()
+            factory = CGen.AnsiFactory(profile)
+            def run() -> int:
+                for token in tokens:
+                    CGen.process_token(token, factory, reset)
+                return len(tokens)
+            return run
+
+        @suite.case(f"process_tokens.{profile_id}")
+        def batch_profile(profile=profile):
+            tokens = suite.hex_tokens()
+            factory = CGen.AnsiFactory(profile)
+            def run() -> int:
+                CGen.process_tokens(tokens, factory, reset)
+                return len(tokens)
+            return run
+
+    for depth in CGen.COLOR_DEPTHS[1:]:
+        @suite.case(f"process_tokens.python.depth{depth}")
+        def quantized_profile(depth=depth):
+            tokens = suite.hex_tokens()
+            factory = CGen.AnsiFactory(CGen.TARGET_PROFILES['python'].with_depth(depth))
+            def run() -> int:
+                CGen.process_tokens(tokens, factory, reset)
+                return len(tokens)
+            return run
+
+    @suite.case("nearest.scalar")
+    def nearest_scalar():
+        rgbs = [system.resolve_color(token)[1] for token in suite.hex_tokens()]
+        def run() -> int:
+            index = CGen.NearestIndex.from_palette(system.colors)
+            for rgb in rgbs:
+                index.query(rgb)
+            return len(rgbs)
+        return run
+
+    @suite.case("nearest.bulk")
+    def nearest_bulk():
+        if not system.bulk_engine.available:
+            return None
+        _, rgb = system.bulk_engine.resolve(suite.hex_tokens())
+        def run() -> int:
+            CGen.NearestIndex.from_palette(system.colors).query_many(rgb)
+            return len(rgb)
+        return run
+
+    def synthetic_palette() -> dict[str, str]:
+        rng = random.Random(suite.seed)
+        words = ["red", "blue", "green", "dark", "light", "pale", "deep", "dusty", "neon", "forest", "ocean", "sky", "rose", "mint", "olive", "slate"]
+        palette = {}
+        while len(palette) < suite.size:
+            palette[f"{rng.choice(words)} {rng.choice(words)} {rng.randint(0, 9999)}"] = f"#{rng.randint(0, 0xFFFFFF):06X}"
+        return palette
+
+    @suite.case("palette.lookup.store")
+    def palette_store_lookup():
+        palette = synthetic_palette()
+        store = CGen.PaletteStore.from_mapping(palette)
+        keys = list(palette)
+        random.Random(suite.seed).shuffle(keys)
+        def run() -> int:
+            for key in keys:
+                store.lookup(key)
+            return len(keys)
+        return run
+
+    @suite.case("palette.lookup.dict")
+    def palette_dict_lookup():
+        palette = synthetic_palette()
+        rgb = {name: CGen.PaletteStore.unpack_rgb(int(hex_val[1:], 16)) for name, hex_val in palette.items()}
+        keys = list(palette)
+        random.Random(suite.seed).shuffle(keys)
+        def run() -> int:
+            for key in keys:
+                if key in palette:
+                    (palette[key], rgb[key])
+            return len(keys)
+        return run
+
+    @suite.case("resolve.scalar.localized")
+    def localized_resolve():
+        index = system.pack_index
+        rng = random.Random(suite.seed)
+        foreign = sorted(name for name in index.entries if name not in system.colors)
+        if not foreign:
+            return None
+        tokens = [rng.choice(foreign) for _ in range(suite.size)]
+        def run() -> int:
+            for token in tokens:
+                system.resolve_color(token)
+            return len(tokens)
+        return run
+
+    @suite.case("pack_index.load")
+    def pack_index_load():
+        def run() -> int:
+            return len(CGen.PackIndex.load(system.pack_cache, system.get_available_packs()))
+        return run
+
+    @suite.case("palette.prefix")
+    def palette_prefix():
+        store = CGen.PaletteStore.from_mapping(synthetic_palette())
+        prefixes = ["dark", "ocean s", "red red 1", "mint"]
+        def run() -> int:
+            return sum(1 for prefix in prefixes for _ in store.with_prefix(prefix))
+        return run
+
+    @suite.case("render.print_result_line")
+    def print_lines():
+        rows = [r for r in CGen.process_tokens(suite.hex_tokens(), python_factory, reset) if r]
+        theme = CGen.TARGET_PROFILES['python'].get_theme_ansi()
+        def run() -> int:
+            with contextlib.redirect_stdout(io.StringIO()):
+                for idx, (p_name, d_name, c_inner, blk) in enumerate(rows, 1):
+                    CGen.print_result_line(idx, p_name, d_name, c_inner, blk, 30, theme)
+            return len(rows)
+        return run
+
+    for fmt, renderer_cls in CGen.OUTPUT_FORMATS.items():
+        @suite.case(f"render.stream.{fmt}")
+        def stream_format(fmt=fmt):
+            lines = suite.hex_tokens()
+            def run() -> int:
+                CGen.run_stream_mode(lines, CGen.TARGET_PROFILES['python'], out=io.StringIO(), fmt=fmt)
+                return len(lines)
+            return run
+
+    @suite.case("render.stream.all_profiles")
+    def stream_all_profiles():
+        lines = suite.hex_tokens()
+        profiles = list(CGen.TARGET_PROFILES.values())
+        def run() -> int:
+            CGen.run_stream_mode(lines, profiles, out=io.StringIO(), fmt='raw')
+            return len(lines) * len(profiles)
+        return run
+
+    @suite.case("random.generate_inputs")
+    def random_inputs():
+        config = dict(system.config, **{'random-limit': suite.size})
+        def run() -> int:
+            saved, system.config = system.config, config
+            try:
+                colors = list(CGen.generate_random_inputs(system, suite.size, persist=False)[0])
+            finally:
+                system.config = saved
+            return len(colors)
+        return run
+
+    for strategy in CGen.RANDOM_STRATEGIES:
+        @suite.case(f"random.iter_colors.{strategy}")
+        def random_strategy(strategy=strategy):
+            spec = CGen.RandomSpec(strategy, suite.seed)
+            def run() -> int:
+                return sum(1 for _ in CGen.iter_random_colors(suite.size, spec))
+            return run
+
+    for space in CGen.GRADIENT_SPACES:
+        @suite.case(f"gradient.{space}")
+        def gradient(space=space):
+            stops = [system.colors.rgb(name) for name in ('red', 'gold', 'teal', 'navy') if name in system.colors] or [(255, 0, 0), (0, 0, 255)]
+            def run() -> int:
+                return sum(1 for _ in CGen.iter_gradient(stops, suite.size, space))
+            return run
+
+    @suite.case("contrast.matrix")
+    def contrast_matrix():
+        rng = random.Random(suite.seed)
+        count = math.isqrt(2 * suite.size) + 1
+        colors = [(f"c{i}", "#000000", (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))) for i in range(count)]
+        matrix = CGen.ContrastMatrix(colors)
+        def run() -> int:
+            return sum(counts[0] for *_, counts in matrix.blocks(matrix.aaa))
+        return run
+
+    @suite.case("interactive.tokenizer")
+    def interactive_lines():
+        rng = random.Random(suite.seed)
+        names = sorted(system.colors)
+        lines = [", ".join(rng.choice(names) if rng.random() < 0.5 else f"#{rng.randint(0, 0xFFF):03x}" for _ in range(20))
+                 for _ in range(max(suite.size // 20, 1))]
+        def run() -> int:
+            feed = iter(lines + ['exit'])
+            original_input = builtins.input
+            builtins.input = lambda prompt='': next(feed)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    CGen.interactive_mode(CGen.TARGET_PROFILES['python'])
+            finally:
+                builtins.input = original_input
+            return len(lines) * 20
+        return run
+
+    @suite.case("api.convert_many")
+    def api_convert_many():
+        rng = random.Random(suite.seed)
+        names = sorted(system.colors)
+        tokens = [rng.choice(names) if rng.random() < 0.5 else f"#{rng.randint(0, 0xFFFFFF):06x}" for _ in range(suite.size)]
+        converter = CGen.ColorConverter(system.current_pack)
+        def run() -> int:
+            return sum(1 for _ in converter.convert_many(tokens))
+        return run
+
+    @suite.case("interactive.paste")
+    def interactive_paste():
+        rng = random.Random(suite.seed)
+        line = " ".join(f"#{rng.randint(0, 0xFFFFFF):06x}" for _ in range(suite.size))
+        def run() -> int:
+            session = CGen.InteractiveSession(CGen.TARGET_PROFILES['python'], system, io.StringIO())
+            return session.run_line(line) + session.run_line(line)
+        return run
+
+    @suite.case("scan.file")
+    def scan_file():
+        rng = random.Random(suite.seed)
+        prefixes = sorted({p.prefix for p in CGen.TARGET_PROFILES.values()})
+        lines = [f'print("{rng.choice(prefixes)}38;2;{rng.randint(0, 255)};{rng.randint(0, 255)};{rng.randint(0, 255)}m")  # #{rng.randint(0, 0xFFFFFF):06x}'
+                 if rng.random() < 0.2 else "value = call(argument_one, argument_two)  # plain line" for _ in range(suite.size)]
+        workdir = tempfile.TemporaryDirectory()
+        path = Path(workdir.name) / 'sample.py'
+        path.write_text("\n".join(lines), encoding='utf-8')
+        def run(workdir=workdir) -> int:
+            _, hits, _ = CGen.scan_file(str(path))
+            return len(hits)
+        return run
+
+    @suite.case("convert.dry_run")
+    def convert_dry_run():
+        rng = random.Random(suite.seed)
+        lines = [f'print("\\033[38;2;{rng.randint(0, 255)};{rng.randint(0, 255)};{rng.randint(0, 255)}mhello\\033[0m")'
+                 if rng.random() < 0.2 else "value = call(argument_one, argument_two)  # plain line" for _ in range(suite.size)]
+        workdir = tempfile.TemporaryDirectory()
+        path = Path(workdir.name) / 'sample.py'
+        path.write_text("\n".join(lines), encoding='utf-8')
+        transpiler = CGen.EscapeTranspiler(CGen.TARGET_PROFILES['python'], CGen.TARGET_PROFILES['go'])
+        def run(workdir=workdir) -> int:
+            _, count, _, _, _ = transpiler.transpile_file(str(path), dry_run=True)
+            return count
+        return run
+
+    for pack_code in system.get_available_packs():
+        @suite.case(f"pack_load.json.{pack_code}")
+        def json_load(pack_code=pack_code):
+            def run() -> int:
+                with tempfile.TemporaryDirectory() as tmp:
+                    CGen.PackCache(cache_dir=Path(tmp)).load(pack_code)
+                return 1
+            return run
+
+        @suite.case(f"pack_load.compiled.{pack_code}")
+        def compiled_load(pack_code=pack_code):
+            cache = CGen.PackCache()
+            cache.load(pack_code)
+            def run() -> int:
+                cache.load(pack_code)
+                return 1
+            return run
+
+    for label, argv in (('version', ['--version']), ('convert', ['red']), ('import', None)):
+        @suite.case(f"cold_start.{label}")
+        def cold_start(argv=argv):
+            if argv is None:
+                command = [sys.executable, '-c', f"import sys; sys.path.insert(0, {str(BENCH_DIR)!r}); import CGen"]
+            else:
+                command = [sys.executable, *CGEN_MODULE, *argv]
+            env = cached_env()
+            def run() -> int:
+                subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, check=False)
+                return 1
+            return run
+
+    return suite
+
+def collect_metadata(args: argparse.Namespace) -> dict[str, Any]:
+    return {
+        "cgen_version": CGen.VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": CGen.load_numpy().__version__ if CGen.load_numpy() is not None else None,
+        "size": args.size,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "timestamp": time.time()
+    }
+
+def compare(results: list[BenchResult], baseline_path: Path, threshold: float) -> int:
+    with baseline_path.open('r', encoding='utf-8') as f:
+        baseline = json.load(f).get('results', {})
+
+    regressions = 0
+    print(f"\n   {'BENCHMARK':<40} {'BASELINE':>12} {'CURRENT':>12} {'RATIO':>8}")
+    for result in results:
+        reference = baseline.get(result.name)
+        if not reference:
+            continue
+        current = result.median / max(result.ops, 1) * 1e6
+        ratio = current / reference['per_op_us'] if reference['per_op_us'] else 0.0
+        flag = "  <-- regression" if ratio > threshold else ""
+        regressions += ratio > threshold
+        print(f"   {result.name:<40} {reference['per_op_us']:>10.3f}us {current:>10.3f}us {ratio:>7.2f}x{flag}")
+    return regressions
+
+def cached_env() -> dict[str, str]:
+    env = {key: value for key, value in os.environ.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(BENCH_DIR), env.get('PYTHONPATH')]))
+    return env
+
+def measure_startup(argv: list[str], runs: int = STARTUP_RUNS) -> tuple[float, float]:
+    env = cached_env()
+    bare = [sys.executable, '-c', 'pass']
+    script = [sys.executable, *CGEN_MODULE, *argv]
+    subprocess.run(script, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, check=False)
+
+    samples: dict[int, list[float]] = {0: [], 1: []}
+    for _ in range(runs):
+        for slot, command in enumerate((bare, script)):
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, check=False)
+            samples[slot].append((time.perf_counter() - start) * 1000)
+    return min(samples[1]), min(samples[0])
+
+def imported_modules(argv: list[str]) -> set[str]:
+    result = subprocess.run([sys.executable, '-X', 'importtime', *CGEN_MODULE, *argv], capture_output=True, text=True, env=cached_env(), check=False)
+    return {line.split('|')[-1].strip() for line in result.stderr.splitlines()
+            if line.startswith('import time:') and 'self [us]' not in line}
+
+def check_startup_budget(budget_ms: float) -> int:
+    failures = 0
+    print(f"\n   {'COMMAND':<40} {'WALL':>12} {'PYTHON':>12} {'OVERHEAD':>12} {'BUDGET':>12}", file=sys.stderr)
+    for label, argv in STARTUP_BUDGET_COMMANDS.items():
+        wall_ms, bare_ms = measure_startup(argv)
+        overhead_ms = wall_ms - bare_ms
+        modules = imported_modules(argv)
+        eager = [name for name in DEFERRED_IMPORTS if name in modules]
+        failed = overhead_ms > budget_ms or bool(eager)
+        failures += failed
+        flag = f"  <-- over budget{' (imports ' + ', '.join(eager) + ')' if eager else ''}" if failed else ""
+        print(f"   {'startup_budget.' + label:<40} {wall_ms:>10.1f}ms {bare_ms:>10.1f}ms {overhead_ms:>10.1f}ms {budget_ms:>10.1f}ms{flag}", file=sys.stderr)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="CGen benchmark suite")
+    parser.add_argument('filters', nargs='*', help='Only run benchmarks whose name contains one of these strings')
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help='Tokens per benchmark run')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Runs per benchmark')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Seed for generated inputs')
+    parser.add_argument('--save', type=Path, default=None, metavar='FILE', help='Write results as JSON')
+    parser.add_argument('--baseline', type=Path, default=None, metavar='FILE', help='Compare against a saved JSON run')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Per-op slowdown ratio treated as a regression')
+    parser.add_argument('--list', action='store_true', help='List benchmark names and exit')
+    parser.add_argument('--startup-budget', type=float, nargs='?', const=DEFAULT_STARTUP_BUDGET_MS, default=None, metavar='MS',
+                        help='Check that --version and a single conversion start within MS milliseconds of a bare interpreter and exit')
+    args = parser.parse_args()
+
+    if args.startup_budget is not None:
+        sys.exit(1 if check_startup_budget(args.startup_budget) else 0)
+
+    suite = build_suite(args.size, args.repeat, args.seed)
+    if args.list:
+        print("\n".join(suite.cases))
+        return
+
+    results = suite.run(args.filters)
+    report = {
+        "metadata": collect_metadata(args),
+        "results": {result.name: result.to_dict() for result in results}
+    }
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        with args.save.open('w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
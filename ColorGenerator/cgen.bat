@@ -6,4 +6,6 @@ IF %ERRORLEVEL% NEQ 0 (
     exit /b 1
 )
 
-python "%~dp0CGen.py" %*
+setlocal
+set "PYTHONPATH=%~dp0;%PYTHONPATH%"
+python -m CGen %*
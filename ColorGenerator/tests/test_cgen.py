@@ -0,0 +1,168 @@
+import io
+import mmap
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+from contextlib import redirect_stderr
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import CGen
+import benchmarks
+
+
+class ColorConverterThreadingTest(unittest.TestCase):
+    def test_depth_256_converters_in_parallel(self):
+        CGen.QUANTIZERS.clear()
+        tokens = [f"#{(i * 7919) % (1 << 24):06x}" for i in range(4000)]
+        expected = [result.code for result in CGen.ColorConverter(depth=256).convert_many(tokens)]
+        CGen.QUANTIZERS.clear()
+
+        converters = [CGen.ColorConverter(depth=256, chunk_size=97) for _ in range(8)]
+        results: list[list[str]] = [[] for _ in converters]
+        errors: list[BaseException] = []
+        barrier = threading.Barrier(len(converters))
+
+        def work(i: int):
+            try:
+                barrier.wait()
+                results[i] = [result.code for result in converters[i].convert_many(tokens)]
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(len(converters))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        for codes in results:
+            self.assertEqual(codes, expected)
+
+
+class BulkEngineLongTokenTest(unittest.TestCase):
+    def test_oversized_token_takes_scalar_path(self):
+        system = CGen.SystemManager(config={})
+        system.load_pack('en')
+        engine = system.bulk_engine
+        if not engine.available:
+            self.skipTest("numpy is not installed")
+
+        tokens = ['red', '#abc', 'nope'] * 1333 + ['f' * 200_000, ' RED' + ' ' * 20_000]
+        tracemalloc.start()
+        try:
+            hexes, rgb = engine.resolve(tokens)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        self.assertLess(peak, 32 * 1024 * 1024)
+        self.assertEqual(hexes[:3], ['#FF0000', '#aabbcc', None])
+        self.assertEqual(hexes[-2:], [None, '#FF0000'])
+        self.assertEqual(rgb[-1].tolist(), [255, 0, 0])
+
+
+class InteractiveSessionWarningTest(unittest.TestCase):
+    def test_every_unresolved_occurrence_warns(self):
+        system = CGen.SystemManager(config={})
+        system.load_pack('en')
+        out, err = io.StringIO(), io.StringIO()
+        session = CGen.InteractiveSession(CGen.TARGET_PROFILES['python'], system, out)
+
+        with redirect_stderr(err):
+            self.assertEqual(session.run_line('nope red nope, nope'), 1)
+            self.assertEqual(session.run_line('nope'), 0)
+
+        self.assertEqual(err.getvalue().count("'nope'"), 4)
+
+
+class ScanPatternTest(unittest.TestCase):
+    def test_hex_literals_need_a_hash(self):
+        source = b're.compile(r"\\bad word\\b")\nprintf "\\ebe \\e[31m"\ncolor = "#abc"\n'
+        with tempfile.TemporaryFile() as f:
+            f.write(source)
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hits = CGen.scan_buffer(mm)
+
+        self.assertEqual([(kind, text) for _, kind, _, text, _ in hits], [('escape', '\\e[31m'), ('hex', '#abc')])
+
+
+class ClientArgsTest(unittest.TestCase):
+    def test_client_only_options_are_not_forwarded(self):
+        argv = ['--connect', '-J4', 'red', '-J', '2', '--jobs=3', '--stats', '-g', '--address', 'unix:/tmp/cgen.sock', 'blue']
+        self.assertEqual(CGen.strip_client_args(argv), ['red', '-g', 'blue'])
+
+
+class VersionHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = b'VERSION = "9.9"\n'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UpdateCheckerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), VersionHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/CGen.py"
+        self.cache = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.cache.name) / 'update.json'
+
+    def tearDown(self):
+        VersionHandler.delay = 0.0
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache.cleanup()
+
+    def checker(self, **kwargs) -> 'CGen.UpdateChecker':
+        return CGen.UpdateChecker(url=self.url, cache_path=self.cache_path, **kwargs)
+
+    def test_completed_check_is_cached_for_the_ttl(self):
+        self.checker().start().join()
+
+        self.assertEqual(self.checker().cached_version(), '9.9')
+        self.assertNotIn('pending', self.checker().read_cache())
+        self.assertIsNone(self.checker().start())
+
+    def test_abandoned_check_is_retried_after_the_retry_window(self):
+        VersionHandler.delay = 1.0
+        self.checker().start()
+
+        entry = self.checker().read_cache()
+        self.assertTrue(entry['pending'])
+        self.assertIsNone(entry['version'])
+        self.assertIsNone(self.checker(retry=60).start())
+
+        thread = self.checker(retry=0).start()
+        self.assertIsNotNone(thread)
+        thread.join()
+        self.assertEqual(self.checker().cached_version(), '9.9')
+
+
+class StartupBudgetTest(unittest.TestCase):
+    def test_cli_starts_within_budget(self):
+        for label, argv in benchmarks.STARTUP_BUDGET_COMMANDS.items():
+            with self.subTest(label):
+                wall_ms, bare_ms = benchmarks.measure_startup(argv)
+                self.assertLess(wall_ms - bare_ms, benchmarks.DEFAULT_STARTUP_BUDGET_MS)
+                modules = benchmarks.imported_modules(argv)
+                self.assertEqual([name for name in benchmarks.DEFERRED_IMPORTS if name in modules], [])
+
+
+if __name__ == '__main__':
+    unittest.main()